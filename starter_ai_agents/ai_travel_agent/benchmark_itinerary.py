@@ -0,0 +1,63 @@
+"""
+Micro-benchmark for itinerary parsing.
+
+Compares the previous lazy DOTALL regex split with the single-pass
+ItineraryParser on synthetic 30-day plans of about 100KB.
+
+Usage:
+    python benchmark_itinerary.py [--days 30] [--size-kb 100] [--repeat 5]
+"""
+import argparse
+import re
+import timeit
+
+from itinerary import generate_ics_content, parse_itinerary
+
+LEGACY_DAY_PATTERN = re.compile(r'Day (\d+)[:\s]+(.*?)(?=Day \d+|$)', re.DOTALL)
+
+ACTIVITIES = [
+    "Guided walking tour of the old town, including the cathedral and the central market.",
+    "Lunch at a family-run bistro known for seasonal regional dishes and local wine.",
+    "Afternoon at the art museum; book tickets online to skip the queue at the entrance.",
+    "Sunset viewpoint hike, about 45 minutes each way, bring water and a light jacket.",
+    "Dinner in the harbour district followed by a short evening river cruise.",
+]
+
+
+def synthetic_plan(days, size_kb):
+    """Builds a markdown itinerary with `days` days and roughly `size_kb` kilobytes of text."""
+    lines_per_day = max(1, (size_kb * 1024) // (days * 90))
+    parts = ["Here is your personalised itinerary.\n"]
+    for day in range(1, days + 1):
+        parts.append(f"\n## Day {day}: Exploring district {day}\n")
+        for i in range(lines_per_day):
+            hour = 8 + i % 12
+            parts.append(f"- {hour % 12 or 12}:{(i * 15) % 60:02d} {'AM' if hour < 12 else 'PM'} – {ACTIVITIES[i % len(ACTIVITIES)]}\n")
+    return "".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--size-kb", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    plan = synthetic_plan(args.days, args.size_kb)
+    print(f"Plan: {args.days} days, {len(plan) / 1024:.0f} KB")
+
+    benchmarks = {
+        "legacy regex split": lambda: LEGACY_DAY_PATTERN.findall(plan),
+        "single-pass parser": lambda: parse_itinerary(plan),
+        "parser + ICS build": lambda: generate_ics_content(plan),
+    }
+    for name, func in benchmarks.items():
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f"{name:>20}: {best * 1000:8.2f} ms")
+
+    days, _ = parse_itinerary(plan)
+    print(f"Parsed {len(days)} days and {sum(len(day['events']) for day in days)} timed events")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import re
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_WORD = re.compile(r"[a-z0-9]+")
+_URL = re.compile(r"https?://[^\s)\]>]+")
+# Only markers at the start of a line begin an item; indented ones are sub-bullets of the current item
+_ITEM_START = re.compile(r"^(?:\d+[.)]|[-*•]|#{1,6})\s+")
+_LIST_MARKER = re.compile(r"^\s*(?:\d+[.)]|[-*•]|#{1,6})\s+", re.MULTILINE)
+# Items with fewer word pairs than this (e.g. a bare "Source: <url>" line) are too short to compare
+MIN_SHINGLES = 4
+
+# Words that carry no signal when comparing research items with the request
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "day", "days", "for", "from", "in", "is", "it",
+    "of", "on", "or", "the", "this", "to", "trip", "with", "you", "your",
+}
+
+
+def estimate_tokens(text):
+    """
+    Local token estimate: words and punctuation marks each count as one token,
+    which tracks BPE token counts closely enough for budgeting.
+    """
+    return len(_TOKEN.findall(text))
+
+
+def truncate_to_tokens(text, budget_tokens):
+    """The beginning of `text` holding at most `budget_tokens` estimated tokens."""
+    for count, match in enumerate(_TOKEN.finditer(text)):
+        if count == budget_tokens:
+            return text[:match.start()].rstrip()
+    return text
+
+
+def _terms(text):
+    return {word for word in _WORD.findall(text.lower()) if word not in STOPWORDS and len(word) > 2}
+
+
+def _shingles(text, size=2):
+    """Word n-grams of an item, ignoring its list markers. Links count, so different sources differ."""
+    words = _WORD.findall(_LIST_MARKER.sub("", text).lower())
+    return {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+
+
+def split_research_items(text):
+    """
+    Splits research output into items: each numbered/bulleted entry or heading
+    at the start of a line starts a new item, and blank lines end one.
+    Continuation lines and indented sub-bullets (such as a "- Source:" line)
+    stay with their item, so attributions are never separated.
+    """
+    items, current = [], []
+    for line in text.splitlines():
+        if not line.strip() or _ITEM_START.match(line):
+            if current:
+                items.append("\n".join(current))
+            current = [line] if line.strip() else []
+        else:
+            current.append(line)
+    if current:
+        items.append("\n".join(current))
+    return items
+
+
+def _normalize_url(url):
+    url = re.sub(r"^https?://(www\.)?", "", url.lower())
+    return url.split("?")[0].split("#")[0].rstrip("/.,")
+
+
+def pack_research(text, request, budget_tokens, duplicate_threshold=0.6):
+    """
+    Fits research results into `budget_tokens` for the planner prompt.
+    Near-duplicate items (same link or overlapping wording) are dropped, the rest
+    are ranked by term overlap with `request` and the researcher's own ordering,
+    and whole items are kept in their original order until the budget is spent,
+    so low-relevance items are the first to go. If not even one item fits,
+    the top-ranked item is cut to the budget rather than sending no research.
+    Returns (packed_text, report) where report counts tokens and items before and after.
+    """
+    items = split_research_items(text)
+    request_terms = _terms(request)
+
+    unique, seen_urls, seen_shingles = [], set(), []
+    for index, item in enumerate(items):
+        urls = {_normalize_url(url) for url in _URL.findall(item)}
+        shingles = _shingles(item)
+        comparable = len(shingles) >= MIN_SHINGLES
+        is_duplicate = bool(urls & seen_urls) or comparable and any(
+            len(shingles & other) / len(shingles | other) >= duplicate_threshold for other in seen_shingles
+        )
+        if is_duplicate:
+            continue
+        seen_urls |= urls
+        if comparable:
+            seen_shingles.append(shingles)
+
+        overlap = len(_terms(item) & request_terms)
+        # Earlier items were ranked higher by the researcher; items with links keep attribution
+        score = overlap + 1 / (1 + index) + (0.5 if urls else 0)
+        unique.append((index, item, estimate_tokens(item), score))
+
+    kept, used = set(), 0
+    for index, _, tokens, _ in sorted(unique, key=lambda entry: entry[3], reverse=True):
+        if used + tokens <= budget_tokens:
+            kept.add(index)
+            used += tokens
+
+    packed = "\n\n".join(item for index, item, _, _ in unique if index in kept)
+    truncated = not kept and bool(unique) and budget_tokens > 0
+    if truncated:
+        index, item, _, _ = max(unique, key=lambda entry: entry[3])
+        packed = truncate_to_tokens(item, budget_tokens)
+        kept.add(index)
+    report = {
+        "tokens_before": estimate_tokens(text),
+        "tokens_after": estimate_tokens(packed),
+        "items_before": len(items),
+        "items_after": len(kept),
+        "duplicates_dropped": len(items) - len(unique),
+        "dropped_for_budget": len(unique) - len(kept),
+        "truncated": truncated,
+    }
+    return packed, report
@@ -0,0 +1,254 @@
+import re
+from datetime import datetime, timedelta
+
+from icalendar import Calendar, Event
+
+# "Day 3: Montmartre", "## Day 3 – Montmartre", "**Day 3**" ... at the start of a line
+DAY_HEADER = re.compile(r"^[\s#>*_\-]*Day\s+(\d+)\b[\s:*_.\-–—]*(.*)$", re.IGNORECASE)
+# "9:00 AM – Museum", "- 14:30 - Lunch", "**7 PM**: Dinner", "9–11 AM: Louvre" at the start of a line
+TIMED_ENTRY = re.compile(
+    r"^[\s*\-•_]*(\d{1,2})(?::(\d{2}))?\s*([ap]\.?m\.?)?"
+    r"(?:\s*(?:-|–|—|to)\s*(\d{1,2})(?::(\d{2}))?\s*([ap]\.?m\.?)?)?"
+    r"\s*[-–—:]\s*(.+)$",
+    re.IGNORECASE,
+)
+
+DEFAULT_EVENT_DURATION = timedelta(hours=1)
+MAX_SUMMARY_LENGTH = 120
+
+
+def _to_24h(hour, minute, meridiem):
+    """Converts a clock time to (hour, minute) on a 24-hour clock, or None if invalid."""
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.lower().startswith("p") else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return hour, minute
+
+
+def _parse_timed_entry(line):
+    """
+    Returns (start, end, title) for a line such as "9:00 AM – Museum", where
+    start and end are (hour, minute) tuples and end is None without a range.
+    Returns None if the line is not a timed entry.
+    """
+    match = TIMED_ENTRY.match(line.replace("**", ""))
+    if not match:
+        return None
+    start_hour, start_minute, start_meridiem, end_hour, end_minute, end_meridiem, title = match.groups()
+    # "9-11 AM": the start shares the end's AM/PM
+    start_meridiem = start_meridiem or end_meridiem
+    # A bare number ("3 - Lunch") is more likely a list item than a time
+    if start_minute is None and start_meridiem is None:
+        return None
+
+    start = _to_24h(int(start_hour), int(start_minute or 0), start_meridiem)
+    end = None
+    if end_hour is not None:
+        end = _to_24h(int(end_hour), int(end_minute or 0), end_meridiem or start_meridiem)
+
+    title = title.strip(" *_")
+    if start is None or not title:
+        return None
+    return start, end, title[:MAX_SUMMARY_LENGTH]
+
+
+class ItineraryParser:
+    """
+    Single-pass, incremental parser for itinerary text.
+    Text can be fed in arbitrary chunks (e.g. streamed tokens); each line is
+    examined exactly once. A day is returned as soon as the next day header
+    arrives, or on close().
+    Each day is a dict with `day`, `title`, `content`, `text` (the raw block,
+    header included) and `events`, a list of (start, end, title) tuples from
+    _parse_timed_entry.
+    """
+
+    def __init__(self):
+        self._pending = []
+        self._current = None
+        self.preamble = []
+
+    def _finish_current(self):
+        day = self._current
+        self._current = None
+        if day is None:
+            return []
+        day["content"] = "\n".join(day.pop("lines")).strip()
+        day["text"] = "\n".join(day.pop("raw_lines")).strip()
+        return [day]
+
+    def _process_line(self, line):
+        header = DAY_HEADER.match(line)
+        if header:
+            finished = self._finish_current()
+            title = header.group(2).strip(" *_")
+            self._current = {
+                "day": int(header.group(1)),
+                "title": title,
+                "lines": [title] if title else [],
+                "raw_lines": [line],
+                "events": [],
+            }
+            return finished
+
+        if self._current is None:
+            self.preamble.append(line)
+            return []
+
+        self._current["lines"].append(line)
+        self._current["raw_lines"].append(line)
+        entry = _parse_timed_entry(line)
+        if entry:
+            self._current["events"].append(entry)
+        return []
+
+    def feed(self, chunk):
+        """Consumes a chunk of text and returns the days completed by it."""
+        self._pending.append(chunk)
+        if "\n" not in chunk:
+            return []
+
+        lines = "".join(self._pending).split("\n")
+        # The last piece has no newline yet and may continue in the next chunk
+        self._pending = [lines.pop()]
+        finished = []
+        for line in lines:
+            finished.extend(self._process_line(line))
+        return finished
+
+    def close(self):
+        """Flushes the remaining text and returns the final day(s)."""
+        finished = self._process_line("".join(self._pending))
+        self._pending = []
+        return finished + self._finish_current()
+
+    @property
+    def current_day(self):
+        """Number of the day being parsed, or None before the first header."""
+        return self._current["day"] if self._current else None
+
+
+def parse_itinerary(plan_text):
+    """Splits an itinerary into days in a single pass. Returns (days, preamble text)."""
+    parser = ItineraryParser()
+    days = parser.feed(plan_text)
+    days.extend(parser.close())
+    return days, "\n".join(parser.preamble).strip()
+
+
+def build_day_events(day, start_date):
+    """
+    Builds the calendar events for one parsed day: an all-day event with the
+    whole plan plus one timed event per "9:00 AM – Activity" entry.
+    """
+    current_date = start_date + timedelta(days=day["day"] - 1)
+    now = datetime.now()
+
+    # Create a single event for the entire day
+    event = Event()
+    event.add('summary', f"Day {day['day']} Itinerary")
+    event.add('description', day["content"])
+    # Make it an all-day event
+    event.add('dtstart', current_date.date())
+    event.add('dtend', current_date.date())
+    event.add("dtstamp", now)
+    events = [event]
+
+    def at(hour_minute):
+        return datetime.combine(current_date.date(), datetime.min.time()).replace(
+            hour=hour_minute[0], minute=hour_minute[1]
+        )
+
+    starts = [at(start) for start, _, _ in day["events"]]
+    for index, ((_, end_time, title), start) in enumerate(zip(day["events"], starts)):
+        # Without an explicit range an entry lasts until the next one starts,
+        # or an hour if it is the last (or the entries are out of order)
+        end = at(end_time) if end_time else None
+        if end is None or end <= start:
+            end = start + DEFAULT_EVENT_DURATION
+            if end_time is None and index + 1 < len(starts) and starts[index + 1] > start:
+                end = starts[index + 1]
+
+        timed_event = Event()
+        timed_event.add('summary', title)
+        timed_event.add('description', f"Day {day['day']}: {title}")
+        timed_event.add('dtstart', start)
+        timed_event.add('dtend', end)
+        timed_event.add("dtstamp", now)
+        events.append(timed_event)
+    return events
+
+
+def new_calendar():
+    cal = Calendar()
+    cal.add('prodid','-//AI Travel Planner//github.com//' )
+    cal.add('version', '2.0')
+    return cal
+
+
+class IncrementalCalendar:
+    """
+    Calendar that is serialized one day at a time, so ICS building can overlap
+    with itinerary generation. Days can be added (or replaced) in any order;
+    to_ical() only joins the already-serialized events.
+    """
+
+    def __init__(self, start_date=None):
+        self.start_date = start_date or datetime.today()
+        self._days = {}
+        header = new_calendar().to_ical()
+        self._header, self._footer = header[:header.rindex(b"END:VCALENDAR")], b"END:VCALENDAR\r\n"
+
+    def add_day(self, day):
+        self._days[day["day"]] = b"".join(
+            event.to_ical() for event in build_day_events(day, self.start_date)
+        )
+
+    def remove_day(self, day_number):
+        self._days.pop(day_number, None)
+
+    @property
+    def day_numbers(self):
+        return sorted(self._days)
+
+    def to_ical(self):
+        return self._header + b"".join(self._days[number] for number in self.day_numbers) + self._footer
+
+
+def generate_ics_content(plan_text:str, start_date: datetime = None) -> bytes:
+    """
+        Generate an ICS calendar file from a travel itinerary text.
+
+        Args:
+            plan_text: The travel itinerary text
+            start_date: Optional start date for the itinerary (defaults to today)
+
+        Returns:
+            bytes: The ICS file content as bytes
+        """
+    cal = new_calendar()
+
+    if start_date is None:
+        start_date = datetime.today()
+
+    # Split the plan into days
+    days, _ = parse_itinerary(plan_text)
+
+    if not days: # If no day pattern found, create a single all-day event with the entire content
+        event = Event()
+        event.add('summary', "Travel Itinerary")
+        event.add('description', plan_text)
+        event.add('dtstart', start_date.date())
+        event.add('dtend', start_date.date())
+        event.add("dtstamp", datetime.now())
+        cal.add_component(event)
+    else:
+        # Process each day
+        for day in days:
+            for event in build_day_events(day, start_date):
+                cal.add_component(event)
+
+    return cal.to_ical()
@@ -0,0 +1,104 @@
+import re
+
+# "day 3", "days 2-4", "days 2 and 6", "days 1, 3 & 5 to 7": a list of day numbers and ranges
+_DAY_LIST = re.compile(r"\bdays?\s+(\d+(?:\s*(?:-|–|to|and|&|,)\s*\d+)*)", re.IGNORECASE)
+# Only these join two numbers into a range; "and", "&" and "," list single days
+_DAY_LIST_PART = re.compile(r"(\d+)(?:\s*(?:-|–|to)\s*(\d+))?", re.IGNORECASE)
+_WORD = re.compile(r"[a-z]+")
+
+# Words in a change request that say nothing about which days it concerns
+STOPWORDS = {
+    "a", "add", "an", "and", "any", "at", "be", "but", "by", "can", "change", "day", "days", "do",
+    "for", "from", "have", "in", "instead", "is", "it", "less", "make", "more", "no", "not", "of",
+    "on", "one", "or", "please", "some", "that", "the", "this", "to", "trip", "want", "we", "with",
+    "without", "would", "you",
+}
+
+
+def referenced_days(change_text, num_days):
+    """
+    Day numbers named in a change request: "day 3", "days 2-4", "days 2 and 6",
+    "first day", "last day".
+    """
+    days = set()
+    for day_list in _DAY_LIST.findall(change_text):
+        for start, end in _DAY_LIST_PART.findall(day_list):
+            first = int(start)
+            last = int(end) if end else first
+            days.update(range(min(first, last), max(first, last) + 1))
+
+    lowered = change_text.lower()
+    if "first day" in lowered or "arrival" in lowered:
+        days.add(1)
+    if "last day" in lowered or "departure" in lowered:
+        days.add(num_days)
+    return {day for day in days if 1 <= day <= num_days}
+
+
+def days_mentioning(change_text, days):
+    """Days whose plan mentions any content word of the change request (e.g. "museums" -> museum days)."""
+    terms = {word.rstrip("s") for word in _WORD.findall(change_text.lower()) if word not in STOPWORDS and len(word) > 3}
+    if not terms:
+        return set()
+    return {
+        day["day"] for day in days
+        if any(term in day["content"].lower() for term in terms)
+    }
+
+
+def plan_changes(old_num_days, new_num_days, change_text, days):
+    """
+    Works out which days an edit affects.
+    Returns (days_to_regenerate, days_to_drop), both sorted lists of day numbers.
+    Changing the trip length regenerates the added days and the old and new
+    last days, since the departure day moves. A change request regenerates the days it
+    names, otherwise the days whose plan mentions what it is about, and every
+    day if it cannot be narrowed down.
+    """
+    regenerate = set()
+    drop = set(range(new_num_days + 1, old_num_days + 1))
+
+    if new_num_days > old_num_days:
+        # The old last day was planned as a departure day
+        regenerate.update(range(old_num_days, new_num_days + 1))
+    elif new_num_days < old_num_days:
+        regenerate.add(new_num_days)
+
+    change_text = (change_text or "").strip()
+    if change_text:
+        kept_days = [day for day in days if day["day"] <= new_num_days]
+        targeted = referenced_days(change_text, new_num_days) or days_mentioning(change_text, kept_days)
+        regenerate.update(targeted or range(1, new_num_days + 1))
+
+    return sorted(regenerate), sorted(drop)
+
+
+def assemble_itinerary(preamble, days):
+    """Rebuilds the itinerary text from its preamble and per-day blocks, in day order."""
+    blocks = [preamble] if preamble else []
+    blocks.extend(day["text"] for day in sorted(days, key=lambda day: day["day"]))
+    return "\n\n".join(blocks)
+
+
+def build_replan_prompt(destination, num_days, preferences, research, days, regenerate, change_text):
+    """Planner prompt that asks only for the days in `regenerate`, with the rest of the plan as context."""
+    unchanged = [day for day in days if day["day"] not in regenerate and day["day"] <= num_days]
+    context = "\n".join(
+        f"Day {day['day']}: {day['title'] or day['content'][:80]}" for day in unchanged
+    ) or "None"
+    requested = ", ".join(f"Day {number}" for number in regenerate)
+
+    return "\n".join([
+        f"Destination: {destination}",
+        f"Duration: {num_days} days",
+        f"Preferences: {preferences or 'None given'}",
+        f"Requested change: {change_text or 'Trip length changed'}",
+        f"Research Results: {research}",
+        "",
+        "The rest of the itinerary stays as it is (do not repeat these activities):",
+        context,
+        "",
+        f"Rewrite only these days: {requested}.",
+        'Output only those days, each starting with a "Day N:" header line, in the same style as a full itinerary.',
+        f"Day {num_days} is the last day of the trip.",
+    ])
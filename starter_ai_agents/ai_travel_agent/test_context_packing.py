@@ -0,0 +1,52 @@
+from context_packing import pack_research, split_research_items
+
+NESTED_RESEARCH = """1. **Eiffel Tower**
+   - Description: Iron lattice tower on the Champ de Mars with views over Paris.
+   - Source: https://www.toureiffel.paris/en
+2. **Louvre Museum**
+   - Description: The world's largest art museum, home of the Mona Lisa.
+   - Source: https://www.louvre.fr/en
+3. **Musée d'Orsay**
+   - Description: Impressionist masterpieces in a former railway station.
+   - Source: https://www.musee-orsay.fr/en"""
+
+
+def test_indented_sub_bullets_stay_with_their_item():
+    items = split_research_items(NESTED_RESEARCH)
+
+    assert len(items) == 3
+    assert items[0].startswith("1. **Eiffel Tower**")
+    assert "Source: https://www.toureiffel.paris/en" in items[0]
+
+
+def test_packing_keeps_every_title_with_its_source():
+    packed, report = pack_research(NESTED_RESEARCH, "Paris museums and landmarks", budget_tokens=10_000)
+
+    assert report["duplicates_dropped"] == 0
+    for title, source in [
+        ("Eiffel Tower", "https://www.toureiffel.paris/en"),
+        ("Louvre Museum", "https://www.louvre.fr/en"),
+        ("Musée d'Orsay", "https://www.musee-orsay.fr/en"),
+    ]:
+        assert title in packed
+        assert source in packed
+
+
+def test_repeated_items_are_still_dropped():
+    research = NESTED_RESEARCH + "\n4. **Eiffel Tower**\n   - Source: https://www.toureiffel.paris/en/"
+
+    packed, report = pack_research(research, "Paris", budget_tokens=10_000)
+
+    assert report["duplicates_dropped"] == 1
+    assert packed.count("Eiffel Tower") == 1
+
+
+def test_item_larger_than_the_budget_is_truncated_not_dropped():
+    paragraph = " ".join(f"Paris sight number {i} is worth a visit." for i in range(300))
+
+    packed, report = pack_research(paragraph, "Paris", budget_tokens=100)
+
+    assert report["truncated"]
+    assert report["items_after"] == 1
+    assert 0 < report["tokens_after"] <= 100
+    assert paragraph.startswith(packed)
\ No newline at end of file
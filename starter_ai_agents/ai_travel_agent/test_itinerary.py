@@ -0,0 +1,125 @@
+from datetime import datetime
+
+import pytest
+from icalendar import Calendar
+
+from itinerary import ItineraryParser, generate_ics_content, parse_itinerary
+
+PLAN = """Here is your 3-day plan for Paris.
+
+## Day 1: Arrival
+- 9:00 AM – Check in at the hotel
+- 12:30 PM - Lunch in Le Marais
+**Day 2** – Museums
+- 9-11 AM: Louvre
+- 2 PM to 4:30 PM - Musée d'Orsay
+Day 3. Montmartre
+- 10:00 – Sacré-Cœur"""
+
+
+def feed_in_chunks(text, size):
+    parser = ItineraryParser()
+    days = []
+    for start in range(0, len(text), size):
+        days.extend(parser.feed(text[start:start + size]))
+    days.extend(parser.close())
+    return days, "\n".join(parser.preamble).strip()
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 50, len(PLAN)])
+def test_chunk_boundaries_do_not_change_the_result(size):
+    assert feed_in_chunks(PLAN, size) == parse_itinerary(PLAN)
+
+
+def test_a_day_is_returned_once_the_next_header_arrives():
+    parser = ItineraryParser()
+
+    assert parser.feed("Day 1: Arrival\n- 9:00 AM – Hotel\nDa") == []
+    assert parser.current_day == 1
+    [day] = parser.feed("y 2: Museums\n")
+    assert day["day"] == 1
+    assert day["events"] == [((9, 0), None, "Hotel")]
+    assert [day["day"] for day in parser.close()] == [2]
+
+
+def test_days_and_preamble():
+    days, preamble = parse_itinerary(PLAN)
+
+    assert preamble == "Here is your 3-day plan for Paris."
+    assert [(day["day"], day["title"]) for day in days] == [(1, "Arrival"), (2, "Museums"), (3, "Montmartre")]
+    assert days[1]["text"].startswith("**Day 2** – Museums")
+
+
+@pytest.mark.parametrize("line", [
+    "Day 4: Versailles",
+    "## Day 4 – Versailles",
+    "**Day 4:** Versailles",
+    "> day 4. Versailles",
+    "  - Day 4 - Versailles",
+])
+def test_header_variants(line):
+    days, _ = parse_itinerary(f"Day 3: Paris\n{line}\n- Gardens")
+
+    assert [(day["day"], day["title"]) for day in days] == [(3, "Paris"), (4, "Versailles")]
+
+
+def test_day_mentioned_mid_line_is_not_a_header():
+    days, _ = parse_itinerary("Day 1: Paris\n- Rest up, as Day 2 starts early\n- Book tickets for day 3 tonight")
+
+    assert [day["day"] for day in days] == [1]
+
+
+@pytest.mark.parametrize("line, event", [
+    ("- 9:00 AM – Museum", ((9, 0), None, "Museum")),
+    ("- 14:30 - Lunch", ((14, 30), None, "Lunch")),
+    ("**7 PM**: Dinner", ((19, 0), None, "Dinner")),
+    ("* 12 a.m. - Night walk", ((0, 0), None, "Night walk")),
+    ("- 9-11 AM: Louvre", ((9, 0), (11, 0), "Louvre")),
+    ("- 10 AM to 2 PM - Walk", ((10, 0), (14, 0), "Walk")),
+    ("- 9:30–11:00 – **Orsay**", ((9, 30), (11, 0), "Orsay")),
+])
+def test_timed_entries(line, event):
+    [day], _ = parse_itinerary(f"Day 1: Paris\n{line}")
+
+    assert day["events"] == [event]
+
+
+@pytest.mark.parametrize("line", [
+    "3 - Lunch at a bistro",
+    "- 13 PM - Impossible time",
+    "- 25:00 - Impossible time",
+    "- 9:00 AM –",
+    "Walk along the Seine at 9:00 AM - then lunch",
+])
+def test_lines_that_are_not_timed_entries(line):
+    [day], _ = parse_itinerary(f"Day 1: Paris\n{line}")
+
+    assert day["events"] == []
+
+
+def test_no_days_gives_a_single_all_day_event():
+    text = "Spend a relaxed week in Paris, visiting museums at your own pace."
+
+    calendar = Calendar.from_ical(generate_ics_content(text, datetime(2026, 5, 1)))
+
+    [event] = calendar.walk("VEVENT")
+    assert str(event["summary"]) == "Travel Itinerary"
+    assert str(event["description"]) == text
+    assert event["dtstart"].dt.isoformat() == "2026-05-01"
+
+
+def test_timed_entries_become_timed_events():
+    calendar = Calendar.from_ical(generate_ics_content(PLAN, datetime(2026, 5, 1)))
+
+    timed = [
+        (str(event["summary"]), event["dtstart"].dt.strftime("%d %H:%M"), event["dtend"].dt.strftime("%H:%M"))
+        for event in calendar.walk("VEVENT")
+        if isinstance(event["dtstart"].dt, datetime)
+    ]
+    assert timed == [
+        ("Check in at the hotel", "01 09:00", "12:30"),
+        ("Lunch in Le Marais", "01 12:30", "13:30"),
+        ("Louvre", "02 09:00", "11:00"),
+        ("Musée d'Orsay", "02 14:00", "16:30"),
+        ("Sacré-Cœur", "03 10:00", "11:00"),
+    ]
\ No newline at end of file
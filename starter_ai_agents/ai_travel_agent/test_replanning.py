@@ -0,0 +1,20 @@
+import pytest
+
+from replanning import referenced_days
+
+
+@pytest.mark.parametrize("change, expected", [
+    ("Change day 3 to a beach day", {3}),
+    ("Make days 2-4 lighter", {2, 3, 4}),
+    ("Make days 3 to 5 lighter", {3, 4, 5}),
+    ("Change days 2 and 6 to be more relaxed", {2, 6}),
+    ("Swap days 2 & 6", {2, 6}),
+    ("Add museums on days 1, 3 and 5-6", {1, 3, 5, 6}),
+    ("Sleep in on the first day and shop on the last day", {1, 7}),
+])
+def test_referenced_days(change, expected):
+    assert referenced_days(change, 7) == expected
+
+
+def test_days_outside_the_trip_are_ignored():
+    assert referenced_days("Change days 6 and 9", 7) == {6}
\ No newline at end of file
@@ -1,61 +1,80 @@
+import time
 from textwrap import dedent
 from agno.agent import Agent
-from agno.tools.serpapi import SerpApiTools
 import streamlit as st
-import re
 from agno.models.openai import OpenAIChat
-from icalendar import Calendar, Event
-from datetime import datetime, timedelta
+from datetime import date, datetime
+from context_packing import pack_research
+from itinerary import IncrementalCalendar, ItineraryParser, generate_ics_content
+from replanning import assemble_itinerary, build_replan_prompt, plan_changes
+from travel_search import SearchCache, TravelSearchTools
 
+# Minimum delay between re-renders of a streaming answer
+STREAM_RENDER_INTERVAL_SECONDS = 0.05
 
-def generate_ics_content(plan_text:str, start_date: datetime = None) -> bytes:
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_ics_content(plan_text: str, start_day: date) -> bytes:
+    """
+    Memoized ICS export. Streamlit keys the cache on a hash of the itinerary text
+    (and the start day), so reruns triggered by other widgets reuse the file
+    instead of rebuilding it.
     """
-        Generate an ICS calendar file from a travel itinerary text.
+    return generate_ics_content(plan_text, datetime.combine(start_day, datetime.min.time()))
 
-        Args:
-            plan_text: The travel itinerary text
-            start_date: Optional start date for the itinerary (defaults to today)
+def stream_agent_run(agent: Agent, prompt: str, placeholder, on_chunk=None) -> str:
+    """
+    Runs an agent with streaming, rendering the text into `placeholder` as it
+    arrives and passing each chunk to `on_chunk`. Returns the full response text.
+    """
+    parts = []
+    last_render = 0.0
+    for chunk in agent.run(prompt, stream=True):
+        # Tool-call and other events carry no text
+        if not isinstance(chunk.content, str) or not chunk.content:
+            continue
+        parts.append(chunk.content)
+        # Re-rendering the whole text on every chunk is quadratic; a few frames per second is smooth enough
+        now = time.perf_counter()
+        if now - last_render >= STREAM_RENDER_INTERVAL_SECONDS:
+            placeholder.markdown("".join(parts) + "▌")
+            last_render = now
+        if on_chunk is not None:
+            on_chunk(chunk.content)
+    text = "".join(parts)
+    placeholder.markdown(text)
+    return text
 
-        Returns:
-            bytes: The ICS file content as bytes
-        """
-    cal = Calendar()
-    cal.add('prodid','-//AI Travel Planner//github.com//' )
-    cal.add('version', '2.0')
-
-    if start_date is None:
-        start_date = datetime.today()
-
-    # Split the plan into days
-    day_pattern = re.compile(r'Day (\d+)[:\s]+(.*?)(?=Day \d+|$)', re.DOTALL)
-    days = day_pattern.findall(plan_text)
-
-    if not days: # If no day pattern found, create a single all-day event with the entire content
-        event = Event()
-        event.add('summary', "Travel Itinerary")
-        event.add('description', plan_text)
-        event.add('dtstart', start_date.date())
-        event.add('dtend', start_date.date())
-        event.add("dtstamp", datetime.now())
-        cal.add_component(event)  
-    else:
-        # Process each day
-        for day_num, day_content in days:
-            day_num = int(day_num)
-            current_date = start_date + timedelta(days=day_num - 1)
-            
-            # Create a single event for the entire day
-            event = Event()
-            event.add('summary', f"Day {day_num} Itinerary")
-            event.add('description', day_content.strip())
-            
-            # Make it an all-day event
-            event.add('dtstart', current_date.date())
-            event.add('dtend', current_date.date())
-            event.add("dtstamp", datetime.now())
-            cal.add_component(event)
+def stream_planner_days(agent: Agent, prompt: str, placeholder, calendar: IncrementalCalendar, calendar_status, accept=None):
+    """
+    Streams a planner run and adds each "Day N" block to `calendar` as soon as it
+    is complete. Only days for which `accept(day_number)` is true are kept.
+    Returns the full text, the parsed days and the text before the first day.
+    """
+    parser = ItineraryParser()
+    days = []
+
+    def add_finished_days(finished):
+        finished = [day for day in finished if accept is None or accept(day["day"])]
+        for day in finished:
+            calendar.add_day(day)
+        days.extend(finished)
+        if finished:
+            calendar_status.caption(
+                "📅 Added to calendar: " + ", ".join(f"Day {n}" for n in calendar.day_numbers)
+            )
+
+    text = stream_agent_run(
+        agent, prompt, placeholder,
+        on_chunk=lambda chunk: add_finished_days(parser.feed(chunk)),
+    )
+    add_finished_days(parser.close())
+    return text, days, "\n".join(parser.preamble).strip()
 
-    return cal.to_ical()
+@st.cache_resource(show_spinner=False)
+def get_search_cache() -> SearchCache:
+    """Search results shared by every session, so popular destinations hit SerpAPI once per day."""
+    return SearchCache(ttl_seconds=12 * 3600, max_entries=2_000, bucket_days=1)
 
 # Set up the Streamlit app
 st.title("AI Travel Planner ")
@@ -64,6 +83,12 @@ st.caption("Plan your next adventure with AI Travel Planner by researching and p
 # Initialize session state to store the generated itinerary
 if 'itinerary' not in st.session_state:
     st.session_state.itinerary = None
+# ICS built while the itinerary streamed in, stored as (itinerary text, ics bytes)
+if 'itinerary_ics' not in st.session_state:
+    st.session_state.itinerary_ics = None
+# Research, per-day blocks and calendar of the last plan, kept for day-level edits
+if 'plan_state' not in st.session_state:
+    st.session_state.plan_state = None
 
 # Get OpenAI API key from user
 openai_api_key = st.text_input("Enter OpenAI API Key to access GPT-4o", type="password")
@@ -85,11 +110,11 @@ if openai_api_key and serp_api_key:
         ),
         instructions=[
             "Given a travel destination and the number of days the user wants to travel for, first generate a list of 3 search terms related to that destination and the number of days.",
-            "For each search term, `search_google` and analyze the results."
+            "Call `search_google_many` once with all of the search terms; the searches run in parallel. Then analyze the results.",
             "From the results of all searches, return the 10 most relevant results to the user's preferences.",
             "Remember: the quality of the results is important.",
         ],
-        tools=[SerpApiTools(api_key=serp_api_key)],
+        tools=[TravelSearchTools(api_key=serp_api_key, cache=get_search_cache())],
         add_datetime_to_instructions=True,
     )
     planner = Agent(
@@ -116,37 +141,136 @@ if openai_api_key and serp_api_key:
     # Input fields for the user's destination and the number of days they want to travel for
     destination = st.text_input("Where do you want to go?")
     num_days = st.number_input("How many days do you want to travel for?", min_value=1, max_value=30, value=7)
+    preferences = st.text_input("Any preferences? (optional)", placeholder="e.g. museums, street food, relaxed pace")
+
+    with st.expander("Advanced settings"):
+        research_token_budget = st.number_input(
+            "Research token budget for the planner",
+            min_value=200, max_value=8000, value=1500, step=100,
+            help="Research results are deduplicated and trimmed to this many (estimated) tokens before planning."
+        )
 
     col1, col2 = st.columns(2)
 
+    with col2:
+        # Filled in while the planner streams, before the download button exists
+        calendar_status = st.empty()
+
     with col1:
         if st.button("Generate Itinerary"):
             with st.spinner("Researching your destination..."):
-                # First get research results
-                research_results = researcher.run(f"Research {destination} for a {num_days} day trip", stream=False)
+                # First get research results, streamed so progress is visible
+                research_content = stream_agent_run(
+                    researcher,
+                    f"Research {destination} for a {num_days} day trip",
+                    st.empty(),
+                )
 
                 # Show research progress
                 st.write(" Research completed")
+
+                # Drop duplicate and low-relevance results so the planner prompt stays within budget
+                packed_research, packing = pack_research(
+                    research_content,
+                    f"{destination} {num_days} days {preferences}",
+                    research_token_budget,
+                )
+                st.caption(
+                    f"Research packed from {packing['tokens_before']} to {packing['tokens_after']} tokens "
+                    f"({packing['items_after']}/{packing['items_before']} items kept, "
+                    f"{packing['duplicates_dropped']} duplicates dropped"
+                    + ("; the top result was cut to fit the budget)" if packing['truncated'] else ")")
+                )
                 
             with st.spinner("Creating your personalized itinerary..."):
                 # Pass research results to planner
                 prompt = f"""
                 Destination: {destination}
                 Duration: {num_days} days
-                Research Results: {research_results.content}
+                Preferences: {preferences or "None given"}
+                Research Results: {packed_research}
                 
                 Please create a detailed itinerary based on this research.
                 """
-                response = planner.run(prompt, stream=False)
+
+                # Each "Day N" block is parsed and added to the calendar as soon as it is complete,
+                # so the ICS is ready when the planner finishes
+                calendar = IncrementalCalendar(datetime.combine(date.today(), datetime.min.time()))
+                itinerary, days, preamble = stream_planner_days(
+                    planner, prompt, st.empty(), calendar, calendar_status
+                )
+
                 # Store the response in session state
-                st.session_state.itinerary = response.content
-                st.write(response.content)
+                st.session_state.itinerary = itinerary
+                if calendar.day_numbers:
+                    st.session_state.itinerary_ics = (itinerary, calendar.to_ical())
+                st.session_state.plan_state = {
+                    "destination": destination,
+                    "num_days": num_days,
+                    "preferences": preferences,
+                    "research": packed_research,
+                    "preamble": preamble,
+                    "days": days,
+                    "calendar": calendar,
+                }
+
+        plan_state = st.session_state.plan_state
+        if plan_state and plan_state["days"] and plan_state["destination"] == destination:
+            with st.expander("✏️ Edit itinerary"):
+                st.caption("Only the days affected by your change are regenerated; the rest of the plan and its calendar events are kept.")
+                change_request = st.text_area(
+                    "What would you like to change?",
+                    placeholder="e.g. Make day 3 more relaxed, or swap the museums for outdoor activities"
+                )
+                if st.button("Update Itinerary"):
+                    change_text = change_request.strip()
+                    if preferences != plan_state["preferences"]:
+                        change_text = f"{change_text}\nNew preferences: {preferences}".strip()
+
+                    regenerate, drop = plan_changes(plan_state["num_days"], num_days, change_text, plan_state["days"])
+                    if not regenerate and not drop:
+                        st.info("Nothing to update: change the trip length or describe what to change.")
+                    else:
+                        calendar = plan_state["calendar"]
+                        for number in drop:
+                            calendar.remove_day(number)
+                        kept = {day["day"]: day for day in plan_state["days"] if day["day"] not in drop}
+
+                        new_days = []
+                        if regenerate:
+                            st.write("🔁 Regenerating " + ", ".join(f"Day {n}" for n in regenerate))
+                            with st.spinner("Updating your itinerary..."):
+                                prompt = build_replan_prompt(
+                                    destination, num_days, preferences, plan_state["research"],
+                                    plan_state["days"], regenerate, change_text,
+                                )
+                                _, new_days, _ = stream_planner_days(
+                                    planner, prompt, st.empty(), calendar, calendar_status,
+                                    accept=lambda number: number in regenerate,
+                                )
+                        missing = set(regenerate) - {day["day"] for day in new_days}
+                        if missing:
+                            st.warning("The planner did not return " + ", ".join(f"Day {n}" for n in sorted(missing)) + "; keeping the previous version where there is one.")
+                        kept.update({day["day"]: day for day in new_days})
+
+                        days = list(kept.values())
+                        itinerary = assemble_itinerary(plan_state["preamble"], days)
+                        st.session_state.itinerary = itinerary
+                        st.session_state.itinerary_ics = (itinerary, calendar.to_ical())
+                        plan_state.update(num_days=num_days, preferences=preferences, days=days)
+
+                        st.success("Itinerary updated")
+                        st.write(itinerary)
     
     # Only show download button if there's an itinerary
     with col2:
         if st.session_state.itinerary:
             # Generate the ICS file
-            ics_content = generate_ics_content(st.session_state.itinerary)
+            prebuilt = st.session_state.itinerary_ics
+            if prebuilt and prebuilt[0] == st.session_state.itinerary:
+                ics_content = prebuilt[1]
+            else:
+                ics_content = get_ics_content(st.session_state.itinerary, date.today())
             
             # Provide the file for download
             st.download_button(
@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from agno.tools import Toolkit
+from serpapi import GoogleSearch
+
+
+class SearchCache:
+    """
+    Thread-safe in-memory cache for search results with a TTL and LRU eviction.
+    Keys are (query, locale, date bucket) so results are shared between users
+    asking the same thing while still refreshing as the bucket rolls over.
+    """
+
+    def __init__(self, ttl_seconds=12 * 3600, max_entries=2_000, bucket_days=1):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.bucket_days = bucket_days
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, query, locale):
+        date_bucket = date.today().toordinal() // self.bucket_days
+        return (" ".join(query.casefold().split()), locale, date_bucket)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if time.time() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+class TravelSearchTools(Toolkit):
+    """
+    Google search through SerpAPI with cached results and a batch tool that
+    runs several searches concurrently instead of one per agent step.
+    """
+
+    def __init__(self, api_key, cache, hl="en", gl="us", num_results=10, max_workers=5):
+        super().__init__(name="travel_search_tools")
+        self.api_key = api_key
+        self.cache = cache
+        self.hl = hl
+        self.gl = gl
+        self.num_results = num_results
+        self.max_workers = max_workers
+        self.register(self.search_google_many)
+        self.register(self.search_google)
+
+    def _search(self, query):
+        """Runs one search, serving it from the cache when possible. Returns a dict of results."""
+        key = self.cache.make_key(query, f"{self.hl}-{self.gl}")
+        results = self.cache.get(key)
+        if results is not None:
+            return results
+
+        try:
+            raw = GoogleSearch({
+                "q": query,
+                "api_key": self.api_key,
+                "num": self.num_results,
+                "hl": self.hl,
+                "gl": self.gl,
+            }).get_dict()
+        except Exception as e:
+            # Errors are returned to the agent but never cached
+            return {"error": f"Error searching for the query {query}: {e}"}
+
+        results = {
+            "search_results": raw.get("organic_results", ""),
+            "knowledge_graph": raw.get("knowledge_graph", ""),
+            "related_questions": raw.get("related_questions", ""),
+        }
+        if "error" not in raw:
+            self.cache.set(key, results)
+        return results
+
+    def search_google_many(self, queries: list[str]) -> str:
+        """
+        Search Google for several queries at once. The searches run in parallel,
+        so always pass all of your search terms in a single call.
+
+        Args:
+            queries (list[str]): The search queries to run.
+
+        Returns:
+            str: JSON object mapping each query to its search results.
+        """
+        queries = [query for query in dict.fromkeys(queries) if query and query.strip()]
+        if not queries:
+            return "Please provide at least one query to search for"
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(queries))) as executor:
+            results = list(executor.map(self._search, queries))
+        return json.dumps(dict(zip(queries, results)))
+
+    def search_google(self, query: str) -> str:
+        """
+        Search Google for a single query.
+
+        Args:
+            query (str): The query to search for.
+
+        Returns:
+            str: JSON object with the search results.
+        """
+        if not query:
+            return "Please provide a query to search for"
+        return json.dumps(self._search(query))
@@ -0,0 +1,172 @@
+"""
+Headless batch mode for the finance agent.
+
+Reads tickers or questions from a CSV or JSONL file and runs the analyses
+concurrently, writing each result as soon as it finishes. Rows already present
+in the output file are skipped, so an interrupted run can simply be restarted.
+
+Usage:
+    python batch_analysis.py tickers.csv --output results.jsonl --concurrency 8
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from finance_agent import async_get_financial_analysis
+
+DEFAULT_TICKER_TEMPLATE = (
+    "Analyze the latest earnings for {ticker} and provide a valuation summary."
+)
+
+
+def load_rows(path, ticker_template=DEFAULT_TICKER_TEMPLATE):
+    """
+    Loads the batch input. Each CSV row or JSON line needs a `question` or a
+    `ticker` column; an optional `id` column names the row in the output.
+    Rows without an id are identified by a hash of their question, which keeps
+    resuming stable even if the input is reordered.
+    """
+    path = Path(path)
+    with path.open(newline="", encoding="utf-8") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            records = [json.loads(line) for line in f if line.strip()]
+        else:
+            records = list(csv.DictReader(f))
+
+    rows = []
+    for line_number, record in enumerate(records, start=1):
+        question = (record.get("question") or "").strip()
+        ticker = (record.get("ticker") or "").strip().upper()
+        if not question and ticker:
+            question = ticker_template.format(ticker=ticker)
+        if not question:
+            print(f"Skipping input row {line_number}: no question or ticker.", file=sys.stderr)
+            continue
+
+        row_id = str(record.get("id") or "").strip()
+        if not row_id:
+            row_id = hashlib.sha1(question.encode("utf-8")).hexdigest()[:12]
+        rows.append({"id": row_id, "ticker": ticker or None, "question": question})
+    return rows
+
+
+def load_completed_ids(output_path):
+    """Returns the ids of rows that already finished successfully in a previous run."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a truncated last line; that row is simply redone
+                continue
+            if result.get("status") == "ok":
+                completed.add(result["id"])
+    return completed
+
+
+def write_markdown(markdown_dir, row, analysis):
+    """Writes one finished analysis as a standalone markdown file."""
+    markdown_dir = Path(markdown_dir)
+    markdown_dir.mkdir(parents=True, exist_ok=True)
+    title = row["ticker"] or row["question"]
+    (markdown_dir / f"{row['id']}.md").write_text(
+        f"# {title}\n\n> {row['question']}\n\n{analysis}\n", encoding="utf-8"
+    )
+
+
+async def run_batch(rows, api_key, output_path, concurrency=8, markdown_dir=None, use_cache=True, use_router=True):
+    """
+    Runs the analyses with at most `concurrency` requests in flight.
+    Results are appended to `output_path` as they finish.
+    Returns the number of successful and failed rows.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"ok": 0, "error": 0}
+
+    with open(output_path, "a", encoding="utf-8") as output:
+
+        async def analyze(row):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    analysis = await async_get_financial_analysis(
+                        row["question"], api_key, use_cache=use_cache, use_router=use_router
+                    )
+                    error = None if analysis else "No analysis returned by the API."
+                except Exception as e:
+                    analysis, error = None, str(e)
+                elapsed = time.perf_counter() - start
+
+            status = "ok" if analysis else "error"
+            counts[status] += 1
+            output.write(json.dumps({
+                **row,
+                "status": status,
+                "analysis": analysis,
+                "error": error,
+                "elapsed_seconds": round(elapsed, 3),
+                "completed_at": datetime.now().isoformat(timespec="seconds"),
+            }) + "\n")
+            # Flush per row so a crash loses at most the rows still in flight
+            output.flush()
+
+            if analysis and markdown_dir:
+                write_markdown(markdown_dir, row, analysis)
+            print(f"[{status}] {row['id']} ({elapsed:.1f}s)", file=sys.stderr)
+
+        await asyncio.gather(*(analyze(row) for row in rows))
+
+    return counts["ok"], counts["error"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run finance analyses for many tickers or questions.")
+    parser.add_argument("input", help="CSV or JSONL file with a `ticker` or `question` column")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--markdown-dir", help="Also write each analysis as <id>.md into this directory")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum number of requests in flight")
+    parser.add_argument("--ticker-template", default=DEFAULT_TICKER_TEMPLATE,
+                        help="Question used for rows that only give a ticker; {ticker} is substituted")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API, ignoring cached answers")
+    parser.add_argument("--no-router", action="store_true",
+                        help="Send every question to the main model instead of routing simple ones to the cheap model")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"),
+                        help="OpenAI API key (defaults to $OPENAI_API_KEY)")
+    args = parser.parse_args(argv)
+
+    if not args.api_key:
+        parser.error("An OpenAI API key is required (--api-key or OPENAI_API_KEY).")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1.")
+
+    rows = load_rows(args.input, args.ticker_template)
+    completed = load_completed_ids(args.output)
+    pending = [row for row in rows if row["id"] not in completed]
+    print(f"{len(rows)} rows, {len(rows) - len(pending)} already done, {len(pending)} to run.", file=sys.stderr)
+
+    ok, failed = asyncio.run(run_batch(
+        pending,
+        args.api_key,
+        args.output,
+        concurrency=args.concurrency,
+        markdown_dir=args.markdown_dir,
+        use_cache=not args.no_cache,
+        use_router=not args.no_router,
+    ))
+    print(f"Finished: {ok} succeeded, {failed} failed.", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
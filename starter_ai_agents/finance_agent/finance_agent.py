@@ -1,13 +1,59 @@
 import streamlit as st
+import asyncio
 import json
-import requests
+import os
 import time
+import weakref
+
+import httpx
+
+from market_data import MarketDataStore
+from model_router import RouteStats, classify_query, needs_escalation
+from rate_limiter import AdaptiveRateLimiter, decorrelated_jitter, parse_retry_after
+from response_cache import ResponseCache, make_cache_key
 
 # --- Configuration ---
 # The model used for generating content
 OPENAI_MODEL_NAME = "gpt-4o"
+# Cheaper, faster model used for simple questions; escalates to OPENAI_MODEL_NAME when needed
+CHEAP_MODEL_NAME = "gpt-4o-mini"
 OPENAI_API_ENDPOINT = "https://api.openai.com/v1/chat/completions"
 
+# Connection pool settings shared by every request to the API.
+# Keep-alive connections avoid a fresh TCP+TLS handshake on each analysis.
+HTTP_MAX_CONNECTIONS = 20
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+HTTP_KEEPALIVE_EXPIRY_SECONDS = 60.0
+HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+# Minimum delay between re-renders of a streaming answer
+STREAM_RENDER_INTERVAL_SECONDS = 0.05
+
+# Response cache: an in-process LRU in front of a persistent SQLite store
+RESPONSE_CACHE_PATH = os.environ.get("FINANCE_AGENT_CACHE_PATH", "finance_cache.sqlite3")
+RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get("FINANCE_AGENT_CACHE_TTL_SECONDS", 6 * 3600))
+RESPONSE_CACHE_MAX_MEMORY_ENTRIES = 256
+RESPONSE_CACHE_MAX_DISK_ENTRIES = 10_000
+
+# Starting request/token budgets per minute; they follow the x-ratelimit-* headers once the API replies
+RATE_LIMIT_REQUESTS_PER_MINUTE = int(os.environ.get("FINANCE_AGENT_RPM", 500))
+RATE_LIMIT_TOKENS_PER_MINUTE = int(os.environ.get("FINANCE_AGENT_TPM", 30_000))
+# Completion tokens assumed for a request that does not set max_tokens
+DEFAULT_COMPLETION_TOKEN_ESTIMATE = 1_500
+# Bounds for the decorrelated-jitter retry delay, in seconds
+RETRY_BASE_DELAY_SECONDS = 1.0
+RETRY_MAX_DELAY_SECONDS = 60.0
+
+# Local price/fundamentals files (prices.parquet|csv, fundamentals.parquet|csv).
+# Metrics for tickers found in the query are computed locally and given to the model.
+MARKET_DATA_DIR = os.environ.get("FINANCE_AGENT_DATA_DIR", "market_data")
+MAX_TICKERS_IN_PROMPT = 50
+
+# Per-route latency and cost are appended here for tuning the routing thresholds
+ROUTE_LOG_PATH = os.environ.get("FINANCE_AGENT_ROUTE_LOG", "finance_routes.jsonl")
+# Queries up to this many words (with at most one ticker and no complex keywords) go to the cheap model
+ROUTER_MAX_SIMPLE_WORDS = 25
+
 # The agent's instructions, defining its persona and output format.
 # Note: Since the standard OpenAI API call doesn't natively include real-time grounding,
 # the prompt relies on the model's up-to-date knowledge and its instruction to act as an analyst.
@@ -18,42 +64,158 @@ SYSTEM_PROMPT = (
     "Provide a detailed and well-structured response."
 )
 
+# Appended to the system prompt when locally computed metrics are available
+MARKET_DATA_PROMPT = (
+    "The user message includes a table of metrics computed from local market data. "
+    "These figures are authoritative: rely on them, do not recompute or repeat the table, "
+    "and focus your answer on commentary and interpretation."
+)
+
+# --- HTTP Clients ---
+
+def _http_limits():
+    """Connection pool limits used by both the sync and async clients."""
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_http_client():
+    """
+    Returns the process-wide pooled HTTP client.
+    Cached as a Streamlit resource so every session and rerun reuses the same
+    keep-alive connections instead of opening a new one per analysis.
+    """
+    return httpx.Client(limits=_http_limits(), timeout=HTTP_TIMEOUT)
+
+
+# An httpx.AsyncClient is bound to the event loop that first uses it,
+# so one pooled client is kept per running loop.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_http_client():
+    """Returns the pooled async HTTP client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(limits=_http_limits(), timeout=HTTP_TIMEOUT)
+        _async_clients[loop] = client
+    return client
+
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    """Returns the process-wide response cache, shared by every session."""
+    return ResponseCache(
+        RESPONSE_CACHE_PATH,
+        ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+        max_memory_entries=RESPONSE_CACHE_MAX_MEMORY_ENTRIES,
+        max_disk_entries=RESPONSE_CACHE_MAX_DISK_ENTRIES,
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_rate_limiter():
+    """Returns the process-wide rate limiter shared by every session and batch worker."""
+    return AdaptiveRateLimiter(RATE_LIMIT_REQUESTS_PER_MINUTE, RATE_LIMIT_TOKENS_PER_MINUTE)
+
+
+@st.cache_resource(show_spinner=False)
+def get_market_data():
+    """Loads the local market data once and precomputes metrics for every ticker."""
+    return MarketDataStore.from_directory(MARKET_DATA_DIR)
+
+
+@st.cache_resource(show_spinner=False)
+def get_route_stats():
+    """Returns the process-wide per-route latency and cost log."""
+    return RouteStats(ROUTE_LOG_PATH)
+
+
 # --- Helper Functions ---
 
+def _auth_headers(api_key):
+    """Builds the request headers, using the API key in the Authorization header for OpenAI."""
+    return {
+        'Content-Type': 'application/json',
+        'Authorization': f'Bearer {api_key}'
+    }
+
+
+def _is_retryable(status_code):
+    """Rate limits (429) and server errors (5xx) are transient and worth retrying."""
+    return status_code == 429 or status_code >= 500
+
+
+def estimate_request_tokens(payload):
+    """
+    Rough token count the API charges against the per-minute token budget:
+    about four characters per prompt token plus the completion allowance.
+    """
+    prompt_chars = sum(len(message.get('content') or '') for message in payload.get('messages', []))
+    return prompt_chars // 4 + payload.get('max_tokens', DEFAULT_COMPLETION_TOKEN_ESTIMATE)
+
+
+def _record_response(limiter, response):
+    """Feeds the rate-limit headers and outcome of a response back into the limiter."""
+    limiter.update_from_headers(response.headers)
+    if response.status_code == 429:
+        limiter.on_rate_limited(response.headers)
+    elif not response.is_error:
+        limiter.on_success()
+
+
+def _retry_delay(response, previous_delay):
+    """Waits at least as long as the server asks, otherwise uses decorrelated jitter."""
+    delay = decorrelated_jitter(previous_delay, RETRY_BASE_DELAY_SECONDS, RETRY_MAX_DELAY_SECONDS)
+    retry_after = parse_retry_after(response.headers)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
 def exponential_backoff_fetch(url, payload, api_key, max_retries=5):
     """
     Handles API fetching with exponential backoff for transient errors.
-    Uses the API key in the Authorization header for OpenAI.
+    Requests go through the shared pooled client, so repeated analyses reuse
+    the same keep-alive connection.
     """
     if not api_key:
         st.error("API Key is missing.")
         return None
-        
-    headers = {
-        'Content-Type': 'application/json',
-        'Authorization': f'Bearer {api_key}'
-    }
-    
+
+    client = get_http_client()
+    limiter = get_rate_limiter()
+    headers = _auth_headers(api_key)
+    estimated_tokens = estimate_request_tokens(payload)
+    delay = RETRY_BASE_DELAY_SECONDS
+
     for attempt in range(max_retries):
         try:
-            # Full URL is used directly without appending the key
-            response = requests.post(url, headers=headers, json=payload)
-            response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+            # Wait for request and token budget before sending
+            limiter.acquire(estimated_tokens)
+            response = client.post(url, headers=headers, json=payload)
+            _record_response(limiter, response)
+            response.raise_for_status() # Raise HTTPStatusError for bad responses (4xx or 5xx)
             
             # Successful response
             return response.json()
 
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             # Handle specific HTTP errors that might require retrying (e.g., 429 Rate Limit)
-            if response.status_code == 429 or response.status_code >= 500:
-                delay = 2 ** attempt
-                st.warning(f"Rate limit or server error ({response.status_code}). Retrying in {delay}s...")
+            if _is_retryable(response.status_code):
+                delay = _retry_delay(response, delay)
+                st.warning(f"Rate limit or server error ({response.status_code}). Retrying in {delay:.1f}s...")
                 time.sleep(delay)
             else:
                 # Other errors (e.g., 401 Unauthorized, 400 Bad Request) are critical
                 st.error(f"OpenAI API Request Failed: {e}. Error details: {response.text}")
                 return None
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             st.error(f"Network Error: {e}")
             return None
             
@@ -61,39 +223,381 @@ def exponential_backoff_fetch(url, payload, api_key, max_retries=5):
     return None
 
 
-def get_financial_analysis(query, api_key):
+async def async_fetch(url, payload, api_key, max_retries=5):
     """
-    Calls the OpenAI Chat Completions API with system instructions.
+    Async variant of exponential_backoff_fetch.
+    Uses the pooled async client and never blocks the event loop, so many
+    analyses can be awaited concurrently (e.g. with asyncio.gather).
     """
-    st.info(f"Analyzing query: '{query}' using {OPENAI_MODEL_NAME}...")
-    
-    # Payload structure for the OpenAI Chat Completions API
-    payload = {
-        "model": OPENAI_MODEL_NAME,
+    if not api_key:
+        st.error("API Key is missing.")
+        return None
+
+    client = get_async_http_client()
+    limiter = get_rate_limiter()
+    headers = _auth_headers(api_key)
+    estimated_tokens = estimate_request_tokens(payload)
+    delay = RETRY_BASE_DELAY_SECONDS
+
+    for attempt in range(max_retries):
+        try:
+            await limiter.acquire_async(estimated_tokens)
+            response = await client.post(url, headers=headers, json=payload)
+            _record_response(limiter, response)
+            response.raise_for_status()
+            return response.json()
+
+        except httpx.HTTPStatusError as e:
+            if _is_retryable(response.status_code):
+                delay = _retry_delay(response, delay)
+                st.warning(f"Rate limit or server error ({response.status_code}). Retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+            else:
+                st.error(f"OpenAI API Request Failed: {e}. Error details: {response.text}")
+                return None
+        except httpx.HTTPError as e:
+            st.error(f"Network Error: {e}")
+            return None
+
+    st.error("Max retries exceeded. The API request failed.")
+    return None
+
+
+def _iter_sse_deltas(lines, metadata=None):
+    """
+    Parses a Chat Completions server-sent event stream.
+    Yields the content delta of each chunk until the terminating `data: [DONE]` event.
+    If `metadata` is a dict, the finish reason and usage block are stored in it.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line.startswith("data:"):
+            # Blank separators, comments and other SSE fields carry no content
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        chunk = json.loads(data)
+        choices = chunk.get('choices') or [{}]
+        if metadata is not None:
+            if chunk.get('usage'):
+                metadata['usage'] = chunk['usage']
+            if choices[0].get('finish_reason'):
+                metadata['finish_reason'] = choices[0]['finish_reason']
+        delta = choices[0].get('delta', {}).get('content')
+        if delta:
+            yield delta
+
+
+def stream_fetch(url, payload, api_key, max_retries=5, metadata=None):
+    """
+    Streaming variant of exponential_backoff_fetch.
+    Sends the request with `stream: true` and yields content deltas as they arrive.
+    Retries only happen before the first byte is received; on failure the error
+    is reported and the generator ends without yielding.
+    If `metadata` is a dict, it receives the finish reason and token usage.
+    """
+    if not api_key:
+        st.error("API Key is missing.")
+        return
+
+    client = get_http_client()
+    limiter = get_rate_limiter()
+    headers = _auth_headers(api_key)
+    payload = {**payload, "stream": True}
+    if metadata is not None:
+        payload["stream_options"] = {"include_usage": True}
+    estimated_tokens = estimate_request_tokens(payload)
+    delay = RETRY_BASE_DELAY_SECONDS
+
+    for attempt in range(max_retries):
+        try:
+            limiter.acquire(estimated_tokens)
+            with client.stream("POST", url, headers=headers, json=payload) as response:
+                _record_response(limiter, response)
+                if response.is_error:
+                    response.read()
+                response.raise_for_status()
+                yield from _iter_sse_deltas(response.iter_lines(), metadata)
+                return
+
+        except httpx.HTTPStatusError as e:
+            if _is_retryable(response.status_code):
+                delay = _retry_delay(response, delay)
+                st.warning(f"Rate limit or server error ({response.status_code}). Retrying in {delay:.1f}s...")
+                time.sleep(delay)
+            else:
+                st.error(f"OpenAI API Request Failed: {e}. Error details: {response.text}")
+                return
+        except httpx.HTTPError as e:
+            st.error(f"Network Error: {e}")
+            return
+        except json.JSONDecodeError as e:
+            st.error(f"Malformed event in the response stream: {e}")
+            return
+
+    st.error("Max retries exceeded. The API request failed.")
+
+
+def record_query_timing(query, time_to_first_token, total_time, streamed, cached=False):
+    """Keeps the time-to-first-token and total time of each query in the session."""
+    if "query_timings" not in st.session_state:
+        st.session_state.query_timings = []
+
+    st.session_state.query_timings.append({
+        "query": query,
+        "streamed": streamed,
+        "cached": cached,
+        "time_to_first_token": round(time_to_first_token, 3),
+        "total_time": round(total_time, 3),
+    })
+
+
+def _stream_financial_analysis(payload, api_key, placeholder, prefix=""):
+    """
+    Renders the analysis into `placeholder` as chunks arrive, after `prefix`.
+    Returns the generated text (without the prefix), the time to the first token
+    in seconds, the finish reason and the token usage.
+    """
+    start = time.perf_counter()
+    time_to_first_token = None
+    metadata = {}
+    parts = []
+    last_render = 0.0
+
+    for delta in stream_fetch(OPENAI_API_ENDPOINT, payload, api_key, metadata=metadata):
+        now = time.perf_counter()
+        if time_to_first_token is None:
+            time_to_first_token = now - start
+        parts.append(delta)
+
+        # Re-rendering on every token is wasteful; a few frames per second is smooth enough.
+        # Partially built markdown tables render as the rows received so far.
+        if now - last_render >= STREAM_RENDER_INTERVAL_SECONDS:
+            placeholder.markdown(prefix + "".join(parts) + "▌")
+            last_render = now
+
+    generated_text = "".join(parts)
+    if generated_text:
+        placeholder.markdown(prefix + generated_text)
+    return generated_text, time_to_first_token, metadata.get('finish_reason'), metadata.get('usage', {})
+
+
+def _parse_completion(result):
+    """Extracts the content, finish reason and usage from a Chat Completions response."""
+    choice = result.get('choices', [{}])[0]
+    return choice.get('message', {}).get('content'), choice.get('finish_reason'), result.get('usage', {})
+
+
+def build_metrics_table(query):
+    """Markdown table of locally computed metrics for the tickers in `query`, or an empty string."""
+    market_data = get_market_data()
+    tickers = market_data.find_tickers(query)[:MAX_TICKERS_IN_PROMPT]
+    return market_data.metrics_table(tickers)
+
+
+def route_query(query):
+    """
+    Picks the model for a query using local heuristics.
+    Returns (route, model, reason) where route is "simple" or "complex".
+    """
+    route, reason = classify_query(
+        query,
+        known_tickers=get_market_data().find_tickers(query),
+        max_simple_words=ROUTER_MAX_SIMPLE_WORDS,
+    )
+    model = CHEAP_MODEL_NAME if route == "simple" else OPENAI_MODEL_NAME
+    return route, model, reason
+
+
+def lookup_cached_answer(route, model, reason, system_prompt, query):
+    """
+    Looks up a cached answer. Answers are cached under the model that gave
+    them, so a simple question whose cheap answer was escalated is found under
+    OPENAI_MODEL_NAME. Returns (text or None, route, model, reason) for the
+    answer found.
+    """
+    candidates = [(route, model, reason)]
+    if route == "simple" and model != OPENAI_MODEL_NAME:
+        candidates.append(("escalated", OPENAI_MODEL_NAME, "low-confidence cheap answer"))
+    for candidate in candidates:
+        cached_text = get_response_cache().get(make_cache_key(candidate[1], system_prompt, query))
+        if cached_text is not None:
+            return (cached_text, *candidate)
+    return (None, route, model, reason)
+
+
+def build_analysis_payload(query, metrics_table="", model=OPENAI_MODEL_NAME):
+    """Payload structure for the OpenAI Chat Completions API."""
+    system_prompt = SYSTEM_PROMPT
+    user_content = query
+    if metrics_table:
+        system_prompt = f"{SYSTEM_PROMPT} {MARKET_DATA_PROMPT}"
+        user_content = f"{query}\n\nMetrics computed from local market data:\n{metrics_table}"
+
+    return {
+        "model": model,
         "messages": [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": query}
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content}
         ]
     }
 
-    # Use the helper function to call the API with backoff
-    result = exponential_backoff_fetch(OPENAI_API_ENDPOINT, payload, api_key)
 
-    if not result:
+def _with_metrics(metrics_table, commentary):
+    """Places the locally computed table above the model's commentary."""
+    if not metrics_table:
+        return commentary
+    return f"{metrics_table}\n\n{commentary}"
+
+
+def get_financial_analysis(query, api_key, stream=False, placeholder=None, use_cache=True, use_router=True):
+    """
+    Calls the OpenAI Chat Completions API with system instructions.
+    With stream=True the answer is rendered incrementally into `placeholder`
+    (an st.empty() slot) while it is being generated.
+    Answers are cached by (model, system prompt, normalized query); a cached
+    answer is returned without calling the API.
+    Metrics for tickers found in local market data are computed here and shown
+    above the model's commentary.
+    With use_router=True simple questions go to CHEAP_MODEL_NAME first and are
+    re-asked of OPENAI_MODEL_NAME if the cheap answer fails the confidence check.
+    """
+    start = time.perf_counter()
+    metrics_table = build_metrics_table(query)
+    if use_router:
+        route, model, reason = route_query(query)
+    else:
+        route, model, reason = "direct", OPENAI_MODEL_NAME, "router disabled"
+    st.session_state.last_route = {"route": route, "model": model, "reason": reason}
+
+    # The metrics are part of the prompt, so fresh data invalidates cached answers
+    cache_prompt = SYSTEM_PROMPT + metrics_table
+
+    if use_cache:
+        cached_text, route, model, reason = lookup_cached_answer(route, model, reason, cache_prompt, query)
+        if cached_text is not None:
+            st.session_state.last_route = {"route": route, "model": model, "reason": reason}
+            if stream and placeholder is not None:
+                placeholder.markdown(cached_text)
+            elapsed = time.perf_counter() - start
+            record_query_timing(query, elapsed, elapsed, streamed=stream, cached=True)
+            get_route_stats().record(route, model, reason, elapsed, {}, cached=True)
+            return cached_text
+
+    if stream and placeholder is None:
+        placeholder = st.empty()
+    prefix = f"{metrics_table}\n\n" if metrics_table else ""
+    time_to_first_token = None
+
+    while True:
+        st.info(f"Analyzing query: '{query}' using {model}...")
+        payload = build_analysis_payload(query, metrics_table, model)
+        call_start = time.perf_counter()
+
+        if stream:
+            commentary, call_ttft, finish_reason, usage = _stream_financial_analysis(
+                payload, api_key, placeholder, prefix
+            )
+            if time_to_first_token is None:
+                time_to_first_token = call_ttft
+        else:
+            # Use the helper function to call the API with backoff
+            result = exponential_backoff_fetch(OPENAI_API_ENDPOINT, payload, api_key)
+            if not result:
+                st.error("Could not retrieve a valid response from the OpenAI API.")
+                return None
+            try:
+                # Extract the generated text from OpenAI's standard response structure
+                commentary, finish_reason, usage = _parse_completion(result)
+            except Exception as e:
+                st.error(f"Error processing API response structure: {e}")
+                return None
+
+        get_route_stats().record(route, model, reason, time.perf_counter() - call_start, usage)
+
+        if route == "simple" and needs_escalation(commentary, finish_reason):
+            # The cheap answer failed the confidence check; ask the stronger model instead
+            route, model, reason = "escalated", OPENAI_MODEL_NAME, "low-confidence cheap answer"
+            st.session_state.last_route = {"route": route, "model": model, "reason": reason}
+            continue
+        break
+
+    if stream and not commentary:
         st.error("Could not retrieve a valid response from the OpenAI API.")
         return None
+    if stream and finish_reason is None:
+        # The stream broke off (the error is already shown); what arrived is only part of an answer
+        st.error("The response stream ended before the answer was complete. Please try again.")
+        return None
 
-    try:
-        # Extract the generated text from OpenAI's standard response structure
-        generated_text = result.get('choices', [{}])[0].get('message', {}).get('content', 'No analysis generated.')
-        
-        # OpenAI responses do not contain the same grounding metadata structure, so sources are omitted.
+    # Without streaming nothing is visible until the full answer arrives
+    elapsed = time.perf_counter() - start
+    record_query_timing(query, time_to_first_token if stream else elapsed, elapsed, streamed=stream)
+
+    if not commentary:
+        return _with_metrics(metrics_table, 'No analysis generated.')
+
+    generated_text = _with_metrics(metrics_table, commentary)
+    if finish_reason != "stop":
+        # Cut off or filtered: shown, but not cached as if it were a complete answer
+        st.warning(f"The answer may be incomplete (finish reason: {finish_reason}).")
         return generated_text
+    # Keyed by the model that actually answered, which differs from the routed one after escalation
+    get_response_cache().set(make_cache_key(model, cache_prompt, query), generated_text)
+
+    # OpenAI responses do not contain the same grounding metadata structure, so sources are omitted.
+    return generated_text
+
+
+async def async_get_financial_analysis(query, api_key, use_cache=True, use_router=True):
+    """
+    Async counterpart of get_financial_analysis, used by the batch runner.
+    Shares the response cache, router and route log with the interactive app,
+    and many calls can be awaited concurrently.
+    """
+    metrics_table = build_metrics_table(query)
+    if use_router:
+        route, model, reason = route_query(query)
+    else:
+        route, model, reason = "direct", OPENAI_MODEL_NAME, "router disabled"
+    cache_prompt = SYSTEM_PROMPT + metrics_table
+
+    if use_cache:
+        cached_text, route, model, reason = lookup_cached_answer(route, model, reason, cache_prompt, query)
+        if cached_text is not None:
+            get_route_stats().record(route, model, reason, 0.0, {}, cached=True)
+            return cached_text
 
-    except Exception as e:
-        st.error(f"Error processing API response structure: {e}")
+    while True:
+        call_start = time.perf_counter()
+        result = await async_fetch(
+            OPENAI_API_ENDPOINT, build_analysis_payload(query, metrics_table, model), api_key
+        )
+        if not result:
+            return None
+
+        try:
+            commentary, finish_reason, usage = _parse_completion(result)
+        except (AttributeError, IndexError) as e:
+            st.error(f"Error processing API response structure: {e}")
+            return None
+
+        get_route_stats().record(route, model, reason, time.perf_counter() - call_start, usage)
+        if route == "simple" and needs_escalation(commentary, finish_reason):
+            route, model, reason = "escalated", OPENAI_MODEL_NAME, "low-confidence cheap answer"
+            continue
+        break
+
+    if not commentary:
         return None
 
+    generated_text = _with_metrics(metrics_table, commentary)
+    # Only complete answers are cached
+    if finish_reason == "stop":
+        get_response_cache().set(make_cache_key(model, cache_prompt, query), generated_text)
+    return generated_text
+
 
 # --- Streamlit Application Layout ---
 
@@ -123,7 +627,49 @@ def main():
             "It is instructed to format all numerical data into clear tables."
         )
         st.markdown("---")
-        st.code(f"Model: {OPENAI_MODEL_NAME}", language="text")
+        st.code(f"Model: {OPENAI_MODEL_NAME}\nSimple queries: {CHEAP_MODEL_NAME}", language="text")
+
+        stream_response = st.toggle(
+            "Stream response",
+            value=True,
+            help="Render the analysis as it is generated instead of waiting for the full answer."
+        )
+        use_router = st.toggle(
+            "Route simple questions to a cheaper model",
+            value=True,
+            help=f"Short single-ticker questions go to {CHEAP_MODEL_NAME} and are escalated to {OPENAI_MODEL_NAME} if the answer looks unreliable."
+        )
+        use_cache = st.toggle(
+            "Use cached answers",
+            value=True,
+            help="Serve repeated questions from the response cache instead of calling the API again."
+        )
+
+        cache_stats = get_response_cache().stats()
+        st.caption(
+            f"Cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits "
+            f"({cache_stats['memory_hits']} memory, {cache_stats['disk_hits']} disk) · "
+            f"{cache_stats['misses']} misses · {cache_stats['disk_entries']} stored"
+        )
+
+        market_tickers = len(get_market_data().tickers)
+        if market_tickers:
+            st.caption(f"Local market data: {market_tickers} tickers")
+        else:
+            st.caption(f"Local market data: none found in `{MARKET_DATA_DIR}/`")
+
+        for route, stats in get_route_stats().summary().items():
+            st.caption(
+                f"Route `{route}`: {stats['calls']} calls · p50 {stats['p50_latency']:.2f}s · "
+                f"p95 {stats['p95_latency']:.2f}s · ${stats['total_cost_usd']:.4f}"
+            )
+
+        limiter_stats = get_rate_limiter().stats()
+        st.caption(
+            f"Rate limit: {limiter_stats['requests_per_minute']:.0f} req/min · "
+            f"{limiter_stats['tokens_per_minute']} tokens/min · "
+            f"{limiter_stats['queue_depth']} waiting"
+        )
 
     # Main interaction area
     
@@ -140,16 +686,40 @@ def main():
             st.warning("Please enter a financial question before clicking 'Get Analysis'.")
             return
 
-        with st.spinner("The AI Finance Agent is gathering data and preparing the analysis..."):
-            
-            # --- API Call Logic ---
-            analysis_text = get_financial_analysis(user_query, api_key)
-            
-            # --- Display Results ---
+        if stream_response:
+            # Streamed output replaces the spinner: the answer itself shows progress
+            st.subheader("📊 Financial Analysis")
+            analysis_text = get_financial_analysis(
+                user_query, api_key, stream=True, placeholder=st.empty(),
+                use_cache=use_cache, use_router=use_router
+            )
             if analysis_text:
-                st.subheader("📊 Financial Analysis")
-                st.markdown(analysis_text)
                 st.success("Analysis Complete!")
+        else:
+            with st.spinner("The AI Finance Agent is gathering data and preparing the analysis..."):
+                
+                # --- API Call Logic ---
+                analysis_text = get_financial_analysis(
+                    user_query, api_key, use_cache=use_cache, use_router=use_router
+                )
+                
+                # --- Display Results ---
+                if analysis_text:
+                    st.subheader("📊 Financial Analysis")
+                    st.markdown(analysis_text)
+                    st.success("Analysis Complete!")
+
+        if analysis_text and st.session_state.get("query_timings"):
+            timing = st.session_state.query_timings[-1]
+            if timing['cached']:
+                st.caption("⚡ Served from cache")
+            last_route = st.session_state.get("last_route")
+            if last_route:
+                st.caption(f"Model: {last_route['model']} ({last_route['route']} route: {last_route['reason']})")
+            st.caption(
+                f"Time to first token: {timing['time_to_first_token']:.2f}s · "
+                f"Total time: {timing['total_time']:.2f}s"
+            )
     
     st.markdown("---")
     st.caption("Disclaimer: This tool provides AI-generated financial insights and should not be considered professional investment advice.")
@@ -0,0 +1,160 @@
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+TRADING_DAYS_PER_MONTH = 21
+
+# Columns expected in each data file
+PRICE_COLUMNS = ["date", "ticker", "close"]
+FUNDAMENTAL_COLUMNS = ["ticker", "fiscal_year", "revenue", "gross_profit", "operating_income", "net_income", "eps"]
+
+# Display name and format of each metric in the table injected into the prompt
+METRIC_FORMATS = {
+    "last_close": ("Last Close", "{:,.2f}"),
+    "return_1m": ("1M Return", "{:+.1%}"),
+    "return_1y": ("1Y Return", "{:+.1%}"),
+    "volatility_1y": ("1Y Volatility", "{:.1%}"),
+    "pe_ratio": ("P/E", "{:.1f}"),
+    "gross_margin": ("Gross Margin", "{:.1%}"),
+    "operating_margin": ("Operating Margin", "{:.1%}"),
+    "net_margin": ("Net Margin", "{:.1%}"),
+    "revenue_growth": ("Revenue Growth", "{:+.1%}"),
+    "eps_growth": ("EPS Growth", "{:+.1%}"),
+}
+
+# As in the router, single letters only count with a "$" prefix: "A quick question" does not name Agilent
+_TICKER_TOKEN = re.compile(r"\$([A-Z]{1,5}(?:\.[A-Z])?)\b|(?<![$\w])([A-Z]{2,5}(?:\.[A-Z])?)\b")
+
+
+def _read_table(data_dir, name, columns):
+    """Reads `<name>.parquet` or `<name>.csv` from the data directory, or None if neither exists."""
+    for suffix, reader in ((".parquet", pd.read_parquet), (".csv", pd.read_csv)):
+        path = Path(data_dir) / f"{name}{suffix}"
+        if path.exists():
+            frame = reader(path)
+            missing = set(columns) - set(frame.columns)
+            if missing:
+                raise ValueError(f"{path} is missing columns: {', '.join(sorted(missing))}")
+            return frame[columns]
+    return None
+
+
+def compute_price_metrics(prices):
+    """
+    Computes trailing returns and annualized volatility for every ticker at once.
+    `prices` is a long table of (date, ticker, close) rows.
+    """
+    closes = (
+        prices.assign(date=pd.to_datetime(prices["date"]), ticker=prices["ticker"].str.upper())
+        .pivot_table(index="date", columns="ticker", values="close")
+        .sort_index()
+        .ffill()
+    )
+    last_close = closes.iloc[-1]
+    year = closes.iloc[-(TRADING_DAYS_PER_YEAR + 1):]
+    log_returns = np.log(year).diff()
+
+    return pd.DataFrame({
+        "last_close": last_close,
+        "return_1m": last_close / closes.iloc[-(TRADING_DAYS_PER_MONTH + 1):].bfill().iloc[0] - 1,
+        "return_1y": last_close / year.bfill().iloc[0] - 1,
+        "volatility_1y": log_returns.std() * np.sqrt(TRADING_DAYS_PER_YEAR),
+    })
+
+
+def compute_fundamental_metrics(fundamentals):
+    """
+    Computes margins and year-over-year growth from the latest fiscal year of each ticker.
+    `fundamentals` has one row per (ticker, fiscal_year).
+    """
+    frame = fundamentals.assign(ticker=fundamentals["ticker"].str.upper()).sort_values(["ticker", "fiscal_year"])
+    by_ticker = frame.groupby("ticker")
+    frame = frame.assign(
+        prior_revenue=by_ticker["revenue"].shift(1),
+        prior_eps=by_ticker["eps"].shift(1),
+    )
+    latest = frame.groupby("ticker").tail(1).set_index("ticker")
+    revenue = latest["revenue"].replace(0, np.nan)
+
+    return pd.DataFrame({
+        "eps": latest["eps"],
+        "gross_margin": latest["gross_profit"] / revenue,
+        "operating_margin": latest["operating_income"] / revenue,
+        "net_margin": latest["net_income"] / revenue,
+        "revenue_growth": latest["revenue"] / latest["prior_revenue"].replace(0, np.nan) - 1,
+        # Growth off a negative base is meaningless, so it is left blank
+        "eps_growth": (latest["eps"] / latest["prior_eps"].where(latest["prior_eps"] > 0)) - 1,
+    })
+
+
+def format_markdown_table(metrics):
+    """Renders a metrics frame (one row per ticker) as a markdown table."""
+    columns = [column for column in METRIC_FORMATS if column in metrics.columns]
+    header = ["Ticker"] + [METRIC_FORMATS[column][0] for column in columns]
+    lines = [
+        "| " + " | ".join(header) + " |",
+        "|" + "---|" * len(header),
+    ]
+    for ticker, row in metrics.iterrows():
+        cells = [ticker]
+        for column in columns:
+            value = row[column]
+            cells.append("n/a" if pd.isna(value) else METRIC_FORMATS[column][1].format(value))
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+class MarketDataStore:
+    """
+    Local price and fundamentals data with precomputed per-ticker metrics.
+    Metrics for every ticker are computed once, column-wise, when the store is
+    built; answering a query only selects rows.
+    """
+
+    def __init__(self, prices=None, fundamentals=None):
+        parts = []
+        if prices is not None and not prices.empty:
+            parts.append(compute_price_metrics(prices))
+        if fundamentals is not None and not fundamentals.empty:
+            parts.append(compute_fundamental_metrics(fundamentals))
+        self.metrics = pd.concat(parts, axis=1) if parts else pd.DataFrame()
+
+        if {"last_close", "eps"} <= set(self.metrics.columns):
+            self.metrics["pe_ratio"] = self.metrics["last_close"] / self.metrics["eps"].where(self.metrics["eps"] > 0)
+
+    @classmethod
+    def from_directory(cls, data_dir):
+        """Loads prices.{parquet,csv} and fundamentals.{parquet,csv} from `data_dir`."""
+        return cls(
+            prices=_read_table(data_dir, "prices", PRICE_COLUMNS),
+            fundamentals=_read_table(data_dir, "fundamentals", FUNDAMENTAL_COLUMNS),
+        )
+
+    @property
+    def tickers(self):
+        return set(self.metrics.index)
+
+    def find_tickers(self, text):
+        """
+        Returns the known tickers mentioned in `text` (e.g. "TSLA" or "$TSLA"),
+        in order of appearance. One-letter tickers need the "$" prefix ("$F").
+        """
+        known = self.tickers
+        found = []
+        for dollar, bare in _TICKER_TOKEN.findall(text):
+            token = dollar or bare
+            if token in known and token not in found:
+                found.append(token)
+        return found
+
+    def metrics_for(self, tickers):
+        """Returns the metric rows for `tickers`, skipping unknown ones."""
+        return self.metrics.loc[[ticker for ticker in tickers if ticker in self.metrics.index]]
+
+    def metrics_table(self, tickers):
+        """Markdown table of the metrics for `tickers`, or an empty string if none are known."""
+        metrics = self.metrics_for(tickers)
+        return format_markdown_table(metrics) if not metrics.empty else ""
@@ -0,0 +1,137 @@
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+
+# USD per 1M tokens (input, output); unknown models are logged with a cost of 0
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+# Words that suggest a multi-step, numerical or comparative analysis
+COMPLEX_KEYWORDS = (
+    "valuation", "valuate", "dcf", "discounted cash flow", "intrinsic value", "fair value",
+    "compare", "comparison", " vs ", "versus", "forecast", "projection", "scenario",
+    "portfolio", "allocation", "sensitivity", "price target",
+    "sum-of-the-parts", "wacc", "peer", "recommend",
+)
+
+# Uppercase tokens that look like tickers but are financial vocabulary
+NON_TICKER_WORDS = {
+    "EPS", "PE", "CEO", "CFO", "IPO", "ETF", "USA", "US", "GDP", "CPI", "FED", "SEC", "ROE", "ROA",
+    "ROI", "EBIT", "EBITDA", "FCF", "DCF", "WACC", "YOY", "QOQ", "TTM", "AI", "API", "ESG", "I", "A",
+}
+
+# Single letters only count with a "$" prefix: "P/E" and "S&P" are not tickers
+_TICKER_LIKE = re.compile(r"\$([A-Z]{1,5})\b|(?<![$\w])([A-Z]{2,5})\b")
+
+# First-person statements that the model could not answer, anywhere in the answer
+_REFUSAL = re.compile(
+    r"\b(?:i|we)(?:'m| am|'re| are)? (?:not sure|unable to|not able to|cannot|can't|do not have|don't have)\b"
+)
+# Hedges that only signal a non-answer when the answer opens with them
+OPENING_HEDGES = ("unable to", "not able to", "sorry", "as an ai")
+OPENING_CHARS = 150
+
+
+def find_ticker_like_tokens(query):
+    """Uppercase tokens in `query` that could be tickers, excluding common financial acronyms."""
+    return {
+        dollar or bare for dollar, bare in _TICKER_LIKE.findall(query)
+        if dollar or bare not in NON_TICKER_WORDS
+    }
+
+
+def classify_query(query, known_tickers=(), max_simple_words=25, max_simple_tickers=1):
+    """
+    Local heuristic router. Returns ("simple" | "complex", reason).
+    A query is complex when it names several tickers, asks for valuation,
+    comparison or forecasting work, or is long.
+    """
+    tickers = find_ticker_like_tokens(query) | set(known_tickers)
+    if len(tickers) > max_simple_tickers:
+        return "complex", f"{len(tickers)} tickers"
+
+    text = f" {query.casefold()} "
+    for keyword in COMPLEX_KEYWORDS:
+        if keyword in text:
+            return "complex", f"keyword '{keyword.strip()}'"
+
+    word_count = len(query.split())
+    if word_count > max_simple_words:
+        return "complex", f"{word_count} words"
+    return "simple", "short single-topic question"
+
+
+def needs_escalation(text, finish_reason, min_answer_chars=200):
+    """
+    Confidence check on an answer from the cheap model: escalate when it was cut
+    off, is implausibly short, or the model says it cannot answer. Phrases such
+    as "unable to" only count at the start of the answer, so analysis like
+    "peers may be unable to refinance" is not mistaken for a refusal.
+    """
+    if finish_reason == "length":
+        return True
+    if not text or len(text.strip()) < min_answer_chars:
+        return True
+    lowered = text.strip().casefold().replace("\u2019", "'")
+    if _REFUSAL.search(lowered):
+        return True
+    return any(phrase in lowered[:OPENING_CHARS] for phrase in OPENING_HEDGES)
+
+
+def estimate_cost(model, usage):
+    """Cost in USD of a call from its `usage` block (prompt_tokens / completion_tokens)."""
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (
+        usage.get("prompt_tokens", 0) * input_price
+        + usage.get("completion_tokens", 0) * output_price
+    ) / 1_000_000
+
+
+class RouteStats:
+    """
+    Collects latency and cost per route so thresholds can be tuned.
+    Every record is kept in memory for the sidebar summary and, if `log_path`
+    is set, appended to a JSONL file.
+    """
+
+    def __init__(self, log_path=None):
+        self.log_path = log_path
+        self._records = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, route, model, reason, latency, usage, cached=False):
+        entry = {
+            "timestamp": time.time(),
+            "route": route,
+            "model": model,
+            "reason": reason,
+            "latency_seconds": round(latency, 3),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "cost_usd": round(estimate_cost(model, usage), 6),
+            "cached": cached,
+        }
+        with self._lock:
+            self._records[route].append(entry)
+            if self.log_path:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+        return entry
+
+    def summary(self):
+        """Per-route call count, p50/p95 latency and total cost."""
+        with self._lock:
+            summary = {}
+            for route, entries in self._records.items():
+                latencies = sorted(entry["latency_seconds"] for entry in entries)
+                summary[route] = {
+                    "calls": len(entries),
+                    "p50_latency": latencies[len(latencies) // 2],
+                    "p95_latency": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                    "total_cost_usd": round(sum(entry["cost_usd"] for entry in entries), 4),
+                }
+            return summary
@@ -0,0 +1,192 @@
+import asyncio
+import datetime
+import email.utils
+import random
+import re
+import threading
+import time
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value):
+    """
+    Parses the reset durations used by the x-ratelimit-reset-* headers
+    ("20ms", "1s", "6m0s", "1h2m3.5s") into seconds. Returns None if unparseable.
+    """
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value.strip())
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def parse_retry_after(headers):
+    """
+    Returns the server-requested wait in seconds from `retry-after-ms` or
+    `Retry-After` (delta-seconds or HTTP date), or None if neither is present or parseable.
+    """
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        # Malformed header: back off as if none were sent
+        return None
+    if retry_at is None:
+        return None
+    if retry_at.tzinfo is None:
+        # HTTP dates are in GMT
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def decorrelated_jitter(previous_delay, base=1.0, cap=60.0):
+    """
+    Decorrelated jitter backoff: each delay is drawn between `base` and three
+    times the previous one. Clients that failed together spread out instead of
+    retrying in lockstep.
+    """
+    return min(cap, random.uniform(base, max(base, previous_delay) * 3))
+
+
+class _TokenBucket:
+    """Continuously refilling bucket; its level may go negative to queue reservations."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def refill(self, now, rate_factor):
+        rate_per_second = self.capacity * rate_factor / 60
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * rate_per_second)
+        self.updated_at = now
+
+    def reserve(self, amount, rate_factor):
+        """Takes `amount` out of the bucket and returns how long to wait until it is covered."""
+        self.level -= amount
+        if self.level >= 0:
+            return 0.0
+        return -self.level / (self.capacity * rate_factor / 60)
+
+
+class AdaptiveRateLimiter:
+    """
+    Process-wide limiter that budgets both requests and tokens per minute.
+
+    Each call reserves one request and its estimated tokens before it is sent.
+    The budgets follow the x-ratelimit-* headers returned by the API, and the
+    effective rate adapts AIMD-style: halved on every 429, raised a little after
+    each success. Safe to share between threads and event loops.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute,
+                 min_rate_factor=0.1, increase_step=0.05, decrease_factor=0.5):
+        self.min_rate_factor = min_rate_factor
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.rate_factor = 1.0
+
+        self._requests = _TokenBucket(requests_per_minute)
+        self._tokens = _TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+        self._waiting = 0
+
+    def _reserve(self, tokens):
+        with self._lock:
+            now = time.monotonic()
+            self._requests.refill(now, self.rate_factor)
+            self._tokens.refill(now, self.rate_factor)
+            # A single request larger than the whole token budget would otherwise wait forever
+            tokens = min(tokens, self._tokens.capacity)
+            return max(
+                self._requests.reserve(1, self.rate_factor),
+                self._tokens.reserve(tokens, self.rate_factor),
+            )
+
+    def acquire(self, tokens):
+        """Blocks until one request carrying `tokens` tokens fits the budget."""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            with self._lock:
+                self._waiting += 1
+            try:
+                time.sleep(delay)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+
+    async def acquire_async(self, tokens):
+        """Async counterpart of acquire; waits without blocking the event loop."""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            with self._lock:
+                self._waiting += 1
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+
+    def update_from_headers(self, headers):
+        """Aligns both budgets with the limits and remaining quota reported by the API."""
+        with self._lock:
+            for bucket, kind in ((self._requests, "requests"), (self._tokens, "tokens")):
+                try:
+                    limit = headers.get(f"x-ratelimit-limit-{kind}")
+                    remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                    if limit:
+                        bucket.capacity = float(limit)
+                    if remaining is not None:
+                        # The server's view wins when it has less left than we think
+                        bucket.level = min(bucket.level, float(remaining))
+                except ValueError:
+                    continue
+
+    def on_success(self):
+        """Additive increase after a request went through."""
+        with self._lock:
+            self.rate_factor = min(1.0, self.rate_factor + self.increase_step)
+
+    def on_rate_limited(self, headers=None):
+        """
+        Multiplicative decrease after a 429. The buckets are drained so that
+        queued callers wait at least until the server's reset time.
+        """
+        with self._lock:
+            self.rate_factor = max(self.min_rate_factor, self.rate_factor * self.decrease_factor)
+            if headers is not None:
+                for bucket, kind in ((self._requests, "requests"), (self._tokens, "tokens")):
+                    reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                    if reset:
+                        bucket.level = min(bucket.level, -reset * bucket.capacity * self.rate_factor / 60)
+
+    def stats(self):
+        """Current effective rates and the number of callers waiting for budget."""
+        with self._lock:
+            now = time.monotonic()
+            self._requests.refill(now, self.rate_factor)
+            self._tokens.refill(now, self.rate_factor)
+            return {
+                "rate_factor": round(self.rate_factor, 3),
+                "requests_per_minute": round(self._requests.capacity * self.rate_factor, 1),
+                "tokens_per_minute": round(self._tokens.capacity * self.rate_factor),
+                "available_requests": round(max(0.0, self._requests.level), 1),
+                "available_tokens": round(max(0.0, self._tokens.level)),
+                "queue_depth": self._waiting,
+            }
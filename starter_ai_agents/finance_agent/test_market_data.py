@@ -0,0 +1,24 @@
+import pandas as pd
+
+from market_data import MarketDataStore
+
+
+def store_with(*tickers):
+    prices = pd.DataFrame(
+        [(date, ticker, 100.0 + day) for ticker in tickers for day, date in enumerate(["2026-01-02", "2026-01-05"])],
+        columns=["date", "ticker", "close"],
+    )
+    return MarketDataStore(prices=prices)
+
+
+def test_one_letter_tickers_need_a_dollar_prefix():
+    store = store_with("A", "F", "TSLA")
+
+    assert store.find_tickers("A quick question: what is the EPS of TSLA?") == ["TSLA"]
+    assert store.find_tickers("Compare $F and $A") == ["F", "A"]
+
+
+def test_tickers_in_order_of_appearance():
+    store = store_with("AAPL", "BRK.B", "TSLA")
+
+    assert store.find_tickers("Is $TSLA riskier than AAPL or BRK.B? And TSLA again") == ["TSLA", "AAPL", "BRK.B"]
\ No newline at end of file
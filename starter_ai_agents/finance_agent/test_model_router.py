@@ -0,0 +1,38 @@
+import pytest
+
+from model_router import classify_query, find_ticker_like_tokens, needs_escalation
+
+COMPLETE_ANSWER = "Revenue grew 12% year over year, driven by services, while margins held steady. " * 4
+
+
+@pytest.mark.parametrize("query", ["What is a good P/E ratio?", "What is the S&P 500?", "What is EPS?"])
+def test_textbook_questions_are_simple(query):
+    assert classify_query(query) == ("simple", "short single-topic question")
+
+
+def test_single_letter_ticker_needs_dollar_prefix():
+    assert find_ticker_like_tokens("Is $F a buy?") == {"F"}
+    assert find_ticker_like_tokens("Is F a buy?") == set()
+
+
+def test_several_tickers_are_complex():
+    assert classify_query("How did AAPL and MSFT do this quarter?") == ("complex", "2 tickers")
+
+
+def test_complete_answer_is_not_escalated():
+    assert not needs_escalation(COMPLETE_ANSWER, "stop")
+    assert not needs_escalation(COMPLETE_ANSWER + "Highly levered peers may be unable to refinance.", "stop")
+
+
+@pytest.mark.parametrize("answer", [
+    "I'm not sure which company you mean. " + COMPLETE_ANSWER,
+    COMPLETE_ANSWER + "However, I cannot access real-time prices.",
+    "Unable to provide current figures. " + COMPLETE_ANSWER,
+])
+def test_refusals_and_opening_hedges_are_escalated(answer):
+    assert needs_escalation(answer, "stop")
+
+
+def test_truncated_or_short_answers_are_escalated():
+    assert needs_escalation(COMPLETE_ANSWER, "length")
+    assert needs_escalation("Revenue grew.", "stop")
\ No newline at end of file
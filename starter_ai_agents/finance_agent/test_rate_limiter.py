@@ -0,0 +1,34 @@
+import time
+from email.utils import formatdate
+
+from rate_limiter import parse_retry_after
+
+
+def test_delta_seconds():
+    assert parse_retry_after({"retry-after": "7"}) == 7.0
+
+
+def test_retry_after_ms_takes_precedence():
+    assert parse_retry_after({"retry-after-ms": "250", "retry-after": "7"}) == 0.25
+
+
+def test_http_date():
+    wait = parse_retry_after({"retry-after": formatdate(time.time() + 30, usegmt=True)})
+    assert 25 <= wait <= 31
+
+
+def test_http_date_without_timezone_is_read_as_gmt():
+    # "-0000" makes parsedate_to_datetime return a naive datetime
+    header = formatdate(time.time() + 30)
+    assert header.endswith("-0000")
+    wait = parse_retry_after({"retry-after": header})
+    assert 25 <= wait <= 31
+
+
+def test_malformed_header_is_ignored():
+    assert parse_retry_after({"retry-after": "garbage"}) is None
+    assert parse_retry_after({"retry-after-ms": "soon"}) is None
+
+
+def test_missing_header():
+    assert parse_retry_after({}) is None
\ No newline at end of file
@@ -0,0 +1,155 @@
+import asyncio
+import codecs
+import math
+import re
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+import httpx
+
+# Connections open at the same time, over all hosts and per host
+MAX_CONNECTIONS = 16
+MAX_CONNECTIONS_PER_HOST = 2
+# Seconds to connect, and to wait for each chunk of a response
+CONNECT_TIMEOUT = 3.0
+READ_TIMEOUT = 5.0
+# An article's fetch is abandoned after this many seconds in total
+ARTICLE_DEADLINE = 8.0
+# Bytes read from one article; the rest of the page is not downloaded
+MAX_ARTICLE_BYTES = 512 * 1024
+# Characters of an article passed on to synthesis
+MAX_ARTICLE_CHARS = 1500
+# Paragraphs shorter than this are bylines, captions and navigation
+MIN_PARAGRAPH_CHARS = 60
+
+USER_AGENT = "Mozilla/5.0 (compatible; NewsInshortsAgent/1.0)"
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class ArticleTextParser(HTMLParser):
+    """
+    Collects the paragraphs of an HTML page as it is fed, chunk by chunk,
+    leaving out scripts, styles and page furniture such as navigation, headers
+    and footers.
+    """
+
+    SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "template"}
+    TEXT_TAGS = {"p", "blockquote"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs = []
+        self._skip_depth = 0
+        self._text_depth = 0
+        self._buffer = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.TEXT_TAGS:
+            self._text_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.TEXT_TAGS and self._text_depth:
+            self._text_depth -= 1
+            if not self._text_depth:
+                self._flush()
+
+    def handle_data(self, data):
+        if self._text_depth and not self._skip_depth:
+            self._buffer.append(data)
+
+    def _flush(self):
+        text = re.sub(r"\s+", " ", "".join(self._buffer)).strip()
+        self._buffer = []
+        if len(text) >= MIN_PARAGRAPH_CHARS:
+            self.paragraphs.append(text)
+
+
+def pack_relevant(paragraphs, topic, max_chars=MAX_ARTICLE_CHARS):
+    """
+    The paragraphs most relevant to `topic` that fit in `max_chars`, in their
+    original order. The first paragraph (the lede) is always kept; the others
+    are ranked by how many of the topic's words they mention, per word.
+    """
+    if not paragraphs:
+        return ""
+    topic_words = set(_WORD.findall(topic.lower()))
+
+    def score(paragraph):
+        words = _WORD.findall(paragraph.lower())
+        return sum(word in topic_words for word in words) / math.sqrt(len(words) or 1)
+
+    ranked = [0] + sorted(range(1, len(paragraphs)), key=lambda i: score(paragraphs[i]), reverse=True)
+    chosen, used = [], 0
+    for i in ranked:
+        if i and score(paragraphs[i]) == 0:
+            break
+        if used + len(paragraphs[i]) > max_chars:
+            continue
+        chosen.append(i)
+        used += len(paragraphs[i])
+    if not chosen:
+        # Even the lede is too long: cut it
+        return paragraphs[0][:max_chars]
+    return "\n".join(paragraphs[i] for i in sorted(chosen))
+
+
+async def fetch_article(client, url, host_slots, max_bytes=MAX_ARTICLE_BYTES):
+    """
+    Streams an article page and returns its paragraphs. Reading stops after
+    `max_bytes`. At most MAX_CONNECTIONS_PER_HOST pages of one host are fetched
+    at a time.
+    """
+    host = urlsplit(url).hostname or ""
+    slot = host_slots.setdefault(host, asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST))
+    async with slot:
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("content-type", "")
+            if "html" not in content_type:
+                raise ValueError(f"not an HTML page ({content_type or 'no content type'})")
+
+            parser = ArticleTextParser()
+            try:
+                decoder = codecs.getincrementaldecoder(response.charset_encoding or "utf-8")(errors="replace")
+            except LookupError:
+                # The page declares a charset Python does not know
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            received = 0
+            async for chunk in response.aiter_bytes():
+                chunk = chunk[:max_bytes - received]
+                received += len(chunk)
+                parser.feed(decoder.decode(chunk))
+                if received >= max_bytes:
+                    break
+            parser.feed(decoder.decode(b"", final=True))
+            parser.close()
+            return parser.paragraphs
+
+
+async def fetch_articles(urls, topic, max_chars=MAX_ARTICLE_CHARS):
+    """
+    Fetches article pages concurrently through one pooled HTTP client and
+    returns {url: packed relevant text}. Pages that fail for any reason, time
+    out or have no paragraphs are left out, so one bad page never stops the rest.
+    """
+    host_slots = {}
+    async with httpx.AsyncClient(
+        headers={"User-Agent": USER_AGENT},
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+        follow_redirects=True,
+    ) as client:
+        async def fetch(url):
+            try:
+                paragraphs = await asyncio.wait_for(fetch_article(client, url, host_slots), ARTICLE_DEADLINE)
+            except Exception:
+                return url, ""
+            return url, pack_relevant(paragraphs, topic, max_chars)
+
+        results = await asyncio.gather(*[fetch(url) for url in dict.fromkeys(urls)])
+    return {url: text for url, text in results if text}
\ No newline at end of file
@@ -1,12 +1,31 @@
+import asyncio
 import streamlit as st
 from duckduckgo_search import DDGS
-from datetime import datetime
 import os
 import openai # Use the official OpenAI library
 
+from article_fetcher import fetch_articles
+from news_cache import STALE, NewsCache, RefreshScheduler, month_bucket, summary_kind
+from news_dedup import cluster_results
+
 # --- Configuration ---
 # Set the OpenAI model to use
 OPENAI_MODEL = "gpt-4o-mini" 
+# Topics processed at the same time in multi-topic mode (searches and model calls)
+DEFAULT_MAX_CONCURRENT_TOPICS = 8
+# Search results and summaries cached per topic and month
+NEWS_CACHE_PATH = os.environ.get("NEWS_CACHE_PATH", "news_cache.sqlite3")
+# Cached entries are fresh for this long, then served while they are refreshed in the background
+NEWS_CACHE_TTL_MINUTES = float(os.environ.get("NEWS_CACHE_TTL_MINUTES", "30"))
+# Stale entries older than this are not served
+NEWS_CACHE_MAX_STALE_HOURS = float(os.environ.get("NEWS_CACHE_MAX_STALE_HOURS", "24"))
+# Comma-separated topics kept fresh in the cache by a background scheduler, using OPENAI_API_KEY
+NEWS_WATCHLIST = [topic.strip() for topic in os.environ.get("NEWS_WATCHLIST", "").split(",") if topic.strip()]
+NEWS_WATCHLIST_INTERVAL_MINUTES = float(os.environ.get("NEWS_WATCHLIST_INTERVAL_MINUTES", "10"))
+# Search results per topic; near-duplicates among them are merged into one story
+NEWS_SEARCH_RESULTS = int(os.environ.get("NEWS_SEARCH_RESULTS", "10"))
+# Stories passed on to synthesis, those reported by the most sources first
+NEWS_MAX_STORIES = int(os.environ.get("NEWS_MAX_STORIES", "5"))
 
 st.set_page_config(page_title="AI News Processor", page_icon="📰")
 st.title("📰 News Inshorts Agent (OpenAI)")
@@ -23,17 +42,46 @@ with st.sidebar:
     else:
         st.warning("Please enter your OpenAI API key to run the agents.")
 
+# --- Cache ---
+@st.cache_resource(show_spinner=False)
+def get_news_cache():
+    """The cache shared by every session."""
+    return NewsCache(
+        NEWS_CACHE_PATH,
+        ttl_seconds=NEWS_CACHE_TTL_MINUTES * 60,
+        max_stale_seconds=NEWS_CACHE_MAX_STALE_HOURS * 3600,
+    )
+
+news_cache = get_news_cache()
+
 # --- Tool Function ---
-def search_news(topic):
-    """Search for news articles using DuckDuckGo"""
+def search_news(topic, use_cache=True, full_articles=False):
+    """
+    Search for news articles using DuckDuckGo. Results that report the same
+    story (e.g. syndicated wire copy) are merged into one, listing every
+    source, and the stories reported most widely are kept. With
+    `full_articles`, each story carries the relevant part of its article
+    instead of the search snippet.
+    """
+    kind = "articles" if full_articles else "search"
+    if use_cache:
+        cached = news_cache.get(topic, kind)
+        if cached:
+            return cached[0]
     with DDGS() as ddg:
         # Search for the topic limited to the current year and month for recency
-        results = ddg.text(f"{topic} news {datetime.now().strftime('%Y-%m')}", max_results=3)
+        results = ddg.text(f"{topic} news {month_bucket()}", max_results=NEWS_SEARCH_RESULTS)
         if results:
+            stories = cluster_results(results)[:NEWS_MAX_STORIES]
+            # Stories whose page could not be fetched keep their snippet
+            articles = asyncio.run(fetch_articles([story['href'] for story in stories], topic)) if full_articles else {}
             news_results = "\n\n".join([
-                f"Title: {result['title']}\nURL: {result['href']}\nSummary: {result['body']}" 
-                for result in results
+                f"Title: {story['title']}\nURL: {story['href']}\n"
+                + (f"Also reported at: {', '.join(story['urls'][1:])}\n" if len(story['urls']) > 1 else "")
+                + (f"Content: {articles[story['href']]}" if story['href'] in articles else f"Summary: {story['body']}")
+                for story in stories
             ])
+            news_cache.put(topic, kind, news_results)
             return news_results
         return f"No news found for {topic}."
 
@@ -87,13 +135,39 @@ labels, or meta-text like "Here's a summary" or "In AP/Reuters style."
 Start directly with the news content.
 """
 
+# Fast mode: synthesis and summary in a single structured response
+BRIEF_INSTRUCTIONS = f"""
+You produce two texts from the raw news articles provided, and return them as JSON.
+
+synthesis:
+{SYNTHESIS_INSTRUCTIONS}
+summary (written from your synthesis):
+{SUMMARY_INSTRUCTIONS}"""
+
+BRIEF_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "news_brief",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "synthesis": {"type": "string"},
+                "summary": {"type": "string"},
+            },
+            "required": ["synthesis", "summary"],
+            "additionalProperties": False,
+        },
+    },
+}
+
 # --- Generic OpenAI Call Function (Replaces client.run) ---
 @st.cache_resource(show_spinner=False)
 def get_openai_client(api_key):
     """Initializes and returns the OpenAI client."""
     return openai.OpenAI(api_key=api_key)
 
-def run_agent_step(client, instructions, prompt, tool_defs=None, tool_choice="none"):
+def run_agent_step(client, instructions, prompt, tool_defs=None, tool_choice="none", full_articles=False):
     """
     Executes a single step of the agent process using the OpenAI API.
     
@@ -103,6 +177,7 @@ def run_agent_step(client, instructions, prompt, tool_defs=None, tool_choice="no
         prompt (str): The user's prompt/content.
         tool_defs (list, optional): List of tool definitions for function calling.
         tool_choice (str): Tool choice setting.
+        full_articles (bool): Whether the search tool fetches the full articles.
         
     Returns:
         str: The final text content from the model.
@@ -128,7 +203,7 @@ def run_agent_step(client, instructions, prompt, tool_defs=None, tool_choice="no
                 
                 if function_name == "search_news":
                     # Execute the local function
-                    tool_output = search_news(function_args.get("topic"))
+                    tool_output = search_news(function_args.get("topic"), full_articles=full_articles)
                     
                     # Send tool output back to the model
                     messages.append(response.choices[0].message)
@@ -164,6 +239,69 @@ def run_agent_step(client, instructions, prompt, tool_defs=None, tool_choice="no
         raise e
 
 
+async def async_run_agent_step(client, instructions, prompt, tool_defs=None, tool_choice="none", full_articles=False):
+    """
+    Async version of run_agent_step for an openai.AsyncOpenAI client. The
+    DuckDuckGo search runs in a worker thread so other topics keep going.
+    
+    Returns:
+        tuple: (final text content from the model, search tool output or None)
+    """
+    messages = [
+        {"role": "system", "content": instructions},
+        {"role": "user", "content": prompt}
+    ]
+    
+    if tool_defs:
+        response = await client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=messages,
+            tools=tool_defs,
+            tool_choice=tool_choice
+        )
+        if response.choices[0].message.tool_calls:
+            tool_call = response.choices[0].message.tool_calls[0]
+            function_name = tool_call.function.name
+            function_args = json.loads(tool_call.function.arguments)
+            
+            if function_name == "search_news":
+                tool_output = await asyncio.to_thread(search_news, function_args.get("topic"), full_articles=full_articles)
+                
+                messages.append(response.choices[0].message)
+                messages.append({
+                    "tool_call_id": tool_call.id,
+                    "role": "tool",
+                    "name": function_name,
+                    "content": tool_output,
+                })
+                second_response = await client.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=messages,
+                )
+                return second_response.choices[0].message.content, tool_output
+        
+        return response.choices[0].message.content, None
+    
+    response = await client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=messages,
+    )
+    return response.choices[0].message.content, None
+
+
+def brief_messages(raw_news_results):
+    """Messages for the fast-mode call that returns synthesis and summary together."""
+    return [
+        {"role": "system", "content": BRIEF_INSTRUCTIONS},
+        {"role": "user", "content": f"Synthesize and summarize these news articles:\n{raw_news_results}"},
+    ]
+
+def parse_brief(response):
+    """Returns (synthesis, summary) from a fast-mode response."""
+    brief = json.loads(response.choices[0].message.content)
+    return brief["synthesis"], brief["summary"]
+
+
 # --- News Processing Workflow (Updated) ---
 
 # Define the tool structure for OpenAI's function calling API
@@ -188,7 +326,7 @@ SEARCH_TOOL_DEFINITION = [
     }
 ]
 
-def process_news(topic, api_key):
+def process_news(topic, api_key, full_articles=False):
     """Run the news processing workflow using the OpenAI API."""
     
     # 1. Initialize client using the key from the sidebar
@@ -203,7 +341,8 @@ def process_news(topic, api_key):
             instructions=SEARCH_INSTRUCTIONS,
             prompt=f"Find recent news about {topic}",
             tool_defs=SEARCH_TOOL_DEFINITION,
-            tool_choice={"type": "function", "function": {"name": "search_news"}}
+            tool_choice={"type": "function", "function": {"name": "search_news"}},
+            full_articles=full_articles
         )
         
         # We need the raw news results (tool_output) for the next step
@@ -236,7 +375,219 @@ def process_news(topic, api_key):
         status.update(label="News Processing Complete!", state="complete", expanded=False)
         return raw_news_results, synthesized_news, final_summary
 
+def process_news_fast(topic, api_key, full_articles=False):
+    """
+    Fast version of process_news: the search tool is called directly instead
+    of through a forced tool call, and synthesis and summary come back from one
+    structured call, so the workflow makes one model call instead of four.
+    """
+    openai_client = get_openai_client(api_key)
+
+    with st.status("Processing news...", expanded=True) as status:
+        status.write("🔍 Searching for news...")
+        raw_news_results = search_news(topic, full_articles=full_articles)
+        
+        status.write("🔄 Synthesizing and summarizing...")
+        try:
+            response = openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=brief_messages(raw_news_results),
+                response_format=BRIEF_RESPONSE_FORMAT,
+            )
+        except openai.APIError as e:
+            st.error(f"OpenAI API Error: {e.message}")
+            raise e
+        synthesized_news, final_summary = parse_brief(response)
+        
+        status.update(label="News Processing Complete!", state="complete", expanded=False)
+        return raw_news_results, synthesized_news, final_summary
+
+def refresh_topic(topic, api_key, full_articles=False):
+    """
+    Searches and summarizes a topic the fast way, without UI, and caches the
+    result. Run by the refresh scheduler in background threads.
+    """
+    raw_news_results = search_news(topic, use_cache=False, full_articles=full_articles)
+    with openai.OpenAI(api_key=api_key) as client:
+        response = client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=brief_messages(raw_news_results),
+            response_format=BRIEF_RESPONSE_FORMAT,
+        )
+    news_cache.put(topic, summary_kind(full_articles), [raw_news_results, *parse_brief(response)])
+
+@st.cache_resource(show_spinner=False)
+def get_refresh_scheduler():
+    """Background refreshes of stale and watched topics, shared by every session."""
+    return RefreshScheduler(
+        refresh_topic,
+        news_cache,
+        watchlist=NEWS_WATCHLIST,
+        api_key=os.environ.get("OPENAI_API_KEY"),
+        interval_seconds=NEWS_WATCHLIST_INTERVAL_MINUTES * 60,
+    )
+
+refresh_scheduler = get_refresh_scheduler()
+
+def cached_news(topic, api_key, full_articles=False):
+    """
+    The cached (raw news, synthesis, summary) of a topic with its (state, age),
+    or None. A stale entry is returned as is and refreshed in the background.
+    """
+    cached = news_cache.get(topic, summary_kind(full_articles), allow_stale=True)
+    if not cached:
+        return None
+    result, state, age = cached
+    if state == STALE:
+        refresh_scheduler.request(topic, api_key, full_articles)
+    return tuple(result), (state, age)
+
+async def async_process_topic(client, topic, semaphore, fast=False, full_articles=False):
+    """
+    The news workflow of process_news (or process_news_fast) for one topic,
+    without UI updates. At most `semaphore`'s limit of topics search and call
+    the model at a time.
+    
+    Returns:
+        tuple: (raw news results, synthesized news, final summary)
+    """
+    async with semaphore:
+        if fast:
+            raw_news_results = await asyncio.to_thread(search_news, topic, full_articles=full_articles)
+            response = await client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=brief_messages(raw_news_results),
+                response_format=BRIEF_RESPONSE_FORMAT,
+            )
+            return (raw_news_results, *parse_brief(response))
+        
+        _, raw_news_results = await async_run_agent_step(
+            client=client,
+            instructions=SEARCH_INSTRUCTIONS,
+            prompt=f"Find recent news about {topic}",
+            tool_defs=SEARCH_TOOL_DEFINITION,
+            tool_choice={"type": "function", "function": {"name": "search_news"}},
+            full_articles=full_articles
+        )
+        if not raw_news_results:
+            raise RuntimeError("The search agent failed to execute the news search tool.")
+        
+        synthesized_news, _ = await async_run_agent_step(
+            client=client,
+            instructions=SYNTHESIS_INSTRUCTIONS,
+            prompt=f"Synthesize these news articles:\n{raw_news_results}"
+        )
+        final_summary, _ = await async_run_agent_step(
+            client=client,
+            instructions=SUMMARY_INSTRUCTIONS,
+            prompt=f"Summarize this synthesis:\n{synthesized_news}"
+        )
+        return raw_news_results, synthesized_news, final_summary
+
+def show_topic_result(topic, raw_news, synthesized_news, final_summary, cached=None):
+    """Renders one topic's summary with its detailed steps, noting if it came from the cache."""
+    st.header(f"📝 News Summary: {topic}")
+    if cached:
+        state, age = cached
+        note = f"⚡ From cache, updated {age / 60:.0f} min ago"
+        st.caption(note + (" · refreshing in the background" if state == STALE else ""))
+    st.markdown(final_summary)
+    
+    # Optional: Show detailed steps
+    with st.expander("Show Detailed Steps"):
+        st.subheader("Raw News Articles")
+        st.code(raw_news, language='markdown')
+        st.subheader("Synthesized News")
+        st.markdown(synthesized_news)
+
+async def process_news_many(
+    topics, api_key, max_concurrency=DEFAULT_MAX_CONCURRENT_TOPICS, fast=False, full_articles=False
+):
+    """
+    Runs the news workflow for many topics concurrently and renders each
+    topic's summary as soon as it is ready, in a slot reserved in topic order.
+    A failed topic shows its error without stopping the others.
+    
+    Returns:
+        dict: topic -> (raw news, synthesis, summary), for the topics that succeeded
+    """
+    slots = {topic: st.empty() for topic in topics}
+    for topic, slot in slots.items():
+        slot.info(f"⏳ Waiting: {topic}")
+    progress = st.progress(0.0, text=f"0 of {len(topics)} topics done")
+    
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results = {}
+    # One client per event loop: its connection pool belongs to this loop
+    async with openai.AsyncOpenAI(api_key=api_key) as client:
+        async def run(topic):
+            hit = cached_news(topic, api_key, full_articles)
+            if hit:
+                return topic, *hit, None
+            try:
+                result = await async_process_topic(client, topic, semaphore, fast, full_articles)
+                news_cache.put(topic, summary_kind(full_articles), list(result))
+                return topic, result, None, None
+            except Exception as e:
+                return topic, None, None, e
+        
+        for done, next_result in enumerate(asyncio.as_completed([run(topic) for topic in topics]), start=1):
+            topic, result, cached, error = await next_result
+            with slots[topic].container():
+                if error is not None:
+                    st.error(f"{topic}: {error}")
+                else:
+                    results[topic] = result
+                    show_topic_result(topic, *result, cached=cached)
+            progress.progress(done / len(topics), text=f"{done} of {len(topics)} topics done")
+    
+    progress.empty()
+    return results
+
 # --- User Interface ---
+with st.sidebar:
+    cache_stats = news_cache.stats()
+    scheduler_stats = refresh_scheduler.stats()
+    st.caption(
+        f"Cache: {cache_stats['entries']} entries, {cache_stats['hits']} hits, "
+        f"{cache_stats['stale_hits']} stale, {cache_stats['misses']} misses · "
+        f"{scheduler_stats['refreshed']} background refreshes, {scheduler_stats['watched']} watched topics"
+    )
+
+mode = st.radio("Mode", ["Single topic", "Multiple topics"], horizontal=True)
+fast_mode = st.toggle(
+    "Fast mode",
+    value=True,
+    help="Search directly and write the synthesis and summary in one model call, instead of "
+    "a search agent call plus separate synthesis and summary calls."
+)
+full_articles = st.toggle(
+    "Fetch full articles",
+    value=False,
+    help="Fetch the pages of the top stories concurrently, passing the relevant paragraphs of each "
+    "article to synthesis instead of the search snippets."
+)
+
+if mode == "Multiple topics":
+    topics_text = st.text_area(
+        "Enter news topics, one per line:",
+        value="artificial intelligence\nclimate policy\nsemiconductors",
+        height=150,
+    )
+    max_concurrency = st.slider("Topics processed at the same time", 1, 16, DEFAULT_MAX_CONCURRENT_TOPICS)
+    if st.button("Process News", type="primary"):
+        # Blank lines and repeated topics are skipped
+        topics = list(dict.fromkeys(line.strip() for line in topics_text.splitlines() if line.strip()))
+        if not topics:
+            st.error("Please enter at least one topic!")
+        elif not openai_key:
+            st.error("Please enter your OpenAI API Key in the sidebar to proceed.")
+        else:
+            asyncio.run(
+                process_news_many(topics, openai_key, max_concurrency, fast=fast_mode, full_articles=full_articles)
+            )
+    st.stop()
+
 topic = st.text_input("Enter news topic:", value="artificial intelligence")
 if st.button("Process News", type="primary"):
     if not topic.strip():
@@ -245,19 +596,19 @@ if st.button("Process News", type="primary"):
         st.error("Please enter your OpenAI API Key in the sidebar to proceed.")
     else:
         try:
-            # Pass the API key from the sidebar to the processing function
-            raw_news, synthesized_news, final_summary = process_news(topic, openai_key)
+            hit = cached_news(topic, openai_key, full_articles)
+            if hit:
+                (raw_news, synthesized_news, final_summary), cached = hit
+            else:
+                # Pass the API key from the sidebar to the processing function
+                run_workflow = process_news_fast if fast_mode else process_news
+                raw_news, synthesized_news, final_summary = run_workflow(topic, openai_key, full_articles=full_articles)
+                cached = None
+                if final_summary:
+                    news_cache.put(topic, summary_kind(full_articles), [raw_news, synthesized_news, final_summary])
             
             if final_summary:
-                st.header(f"📝 News Summary: {topic}")
-                st.markdown(final_summary)
-                
-                # Optional: Show detailed steps
-                with st.expander("Show Detailed Steps"):
-                    st.subheader("Raw News Articles")
-                    st.code(raw_news, language='markdown')
-                    st.subheader("Synthesized News")
-                    st.markdown(synthesized_news)
+                show_topic_result(topic, raw_news, synthesized_news, final_summary, cached=cached)
 
         except Exception as e:
             # Error is already shown inside run_agent_step, but this catches broader issues
@@ -0,0 +1,175 @@
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+FRESH = "fresh"
+STALE = "stale"
+
+
+def summary_kind(full_articles=False):
+    """Cache kind of a topic's summary; summaries of full articles are kept apart from snippet ones."""
+    return "news:articles" if full_articles else "news"
+
+
+def normalize_topic(topic):
+    """Cache key form of a topic: lowercase with collapsed whitespace."""
+    return re.sub(r"\s+", " ", topic).strip().lower()
+
+
+def month_bucket(now=None):
+    """The month searches are limited to, e.g. "2026-10"."""
+    return (now or datetime.now()).strftime("%Y-%m")
+
+
+class NewsCache:
+    """
+    Persistent cache of search results and news summaries in SQLite (WAL mode),
+    keyed by (topic, month bucket, kind). A new month starts with an empty cache,
+    like the searches themselves.
+
+    Entries younger than `ttl_seconds` are fresh. Older ones are stale but can
+    still be served while a refresh runs (stale-while-revalidate), up to
+    `max_stale_seconds`, after which they are removed.
+    """
+
+    def __init__(self, path, ttl_seconds=30 * 60, max_stale_seconds=24 * 3600):
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        # Searches run in worker threads and the scheduler writes from its own
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS news_cache ("
+            " topic TEXT NOT NULL,"
+            " month TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (topic, month, kind))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS news_cache_updated_at ON news_cache (updated_at)")
+        self._db.commit()
+
+    def get(self, topic, kind, allow_stale=False):
+        """
+        Returns (value, state, age in seconds), where state is FRESH or STALE,
+        or None on a miss. Stale entries count as misses unless `allow_stale`.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, updated_at FROM news_cache WHERE topic = ? AND month = ? AND kind = ?",
+                (normalize_topic(topic), month_bucket(), kind),
+            ).fetchone()
+            age = time.time() - row[1] if row else None
+            if row is None or age > self.max_stale_seconds or (age > self.ttl_seconds and not allow_stale):
+                self.misses += 1
+                return None
+            if age > self.ttl_seconds:
+                self.stale_hits += 1
+                return json.loads(row[0]), STALE, age
+            self.hits += 1
+            return json.loads(row[0]), FRESH, age
+
+    def age(self, topic, kind):
+        """Seconds since the entry was updated, or None if there is none. Not counted in the stats."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT updated_at FROM news_cache WHERE topic = ? AND month = ? AND kind = ?",
+                (normalize_topic(topic), month_bucket(), kind),
+            ).fetchone()
+        return time.time() - row[0] if row else None
+
+    def put(self, topic, kind, value):
+        """Stores a value, replacing any earlier one, and removes entries past `max_stale_seconds`."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO news_cache (topic, month, kind, value, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (normalize_topic(topic), month_bucket(), kind, json.dumps(value), now),
+            )
+            self._db.execute("DELETE FROM news_cache WHERE updated_at < ?", (now - self.max_stale_seconds,))
+            self._db.commit()
+
+    def stats(self):
+        """Returns hit/stale hit/miss counters and the number of cached entries."""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM news_cache").fetchone()[0]
+            return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses, "entries": entries}
+
+
+class RefreshScheduler:
+    """
+    Refreshes cached topics in background threads. `refresh(topic, api_key,
+    full_articles)` recomputes a topic's summary and stores it in the cache.
+
+    request() queues a one-off refresh, e.g. after serving a stale entry; a
+    summary already being refreshed is not queued twice. Topics on the watchlist
+    are refreshed every `interval_seconds` whenever their cached summary is
+    missing or would go stale before the next round, so they are always served
+    from the cache. The watchlist needs a server-side `api_key`.
+    """
+
+    def __init__(self, refresh, cache, watchlist=(), api_key=None, interval_seconds=600, max_workers=4):
+        self.refresh = refresh
+        self.cache = cache
+        self.watchlist = list(watchlist)
+        self.api_key = api_key
+        self.interval_seconds = interval_seconds
+        self.refreshed = 0
+        self.failed = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news-refresh")
+        if self.watchlist and self.api_key:
+            threading.Thread(target=self._watch, name="news-watchlist", daemon=True).start()
+
+    def request(self, topic, api_key, full_articles=False):
+        """Queues a refresh of `topic`'s summary. Returns False if one is already pending."""
+        key = (normalize_topic(topic), summary_kind(full_articles))
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+        self._executor.submit(self._refresh, topic, key, api_key, full_articles)
+        return True
+
+    def _refresh(self, topic, key, api_key, full_articles):
+        try:
+            self.refresh(topic, api_key, full_articles)
+            self.refreshed += 1
+        except Exception:
+            self.failed += 1
+            logger.exception("Refreshing %r failed", topic)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def _watch(self):
+        while True:
+            for topic in self.watchlist:
+                age = self.cache.age(topic, summary_kind())
+                if age is None or age > self.cache.ttl_seconds - self.interval_seconds:
+                    self.request(topic, self.api_key)
+            time.sleep(self.interval_seconds)
+
+    def stats(self):
+        """Returns the refresh counters, the pending refreshes and the watched topics."""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "pending": pending,
+            "watched": len(self.watchlist) if self.api_key else 0,
+        }
\ No newline at end of file
@@ -0,0 +1,87 @@
+import hashlib
+import re
+from collections import defaultdict
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Results whose word sets have at least this Jaccard similarity report the same story
+NEAR_DUPLICATE_THRESHOLD = 0.5
+# Two results with similarity s share at least one band with probability
+# 1 - (1 - s**ROWS_PER_BAND)**BANDS, which is over 99.9% at the 0.5 threshold.
+# Dissimilar candidates that still share a band fail the exact Jaccard check.
+BANDS = 32
+ROWS_PER_BAND = 2
+
+
+def story_terms(result):
+    """The set of words in a search result's title and snippet, which clustering compares."""
+    return set(_WORD.findall(f"{result['title']} {result['body']}".lower()))
+
+
+def minhash(terms):
+    """
+    MinHash signature of a set of words: for each position, the smallest
+    hash of any word under that position's salt. The share of positions two
+    signatures agree on estimates their Jaccard similarity.
+    """
+    encoded = [term.encode("utf-8") for term in terms] or [b""]
+    return [
+        min(hashlib.blake2b(word, digest_size=8, salt=position.to_bytes(16, "big")).digest() for word in encoded)
+        for position in range(BANDS * ROWS_PER_BAND)
+    ]
+
+
+def lsh_buckets(signature):
+    """One bucket key per band of the signature."""
+    return [
+        (band, tuple(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]))
+        for band in range(BANDS)
+    ]
+
+
+def jaccard(a, b):
+    """Share of words two results have in common."""
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def cluster_results(results, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """
+    Groups search results ({"title", "href", "body"}) that report the same
+    story, such as syndicated wire copy. Candidate pairs come from MinHash LSH
+    and are kept if their word sets' Jaccard similarity is at least `threshold`.
+
+    Returns one dict per story: the result with the longest snippet as its
+    representative, plus `urls` (every source, representative first) and
+    `size`. Stories reported by more sources come first, then in search order.
+    """
+    terms = [story_terms(result) for result in results]
+    parent = list(range(len(results)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets = defaultdict(list)
+    for i, words in enumerate(terms):
+        for bucket in lsh_buckets(minhash(words)):
+            buckets[bucket].append(i)
+    for members in buckets.values():
+        for position, i in enumerate(members):
+            for j in members[position + 1:]:
+                if root(i) != root(j) and jaccard(terms[i], terms[j]) >= threshold:
+                    parent[root(j)] = root(i)
+
+    clusters = defaultdict(list)
+    for i in range(len(results)):
+        clusters[root(i)].append(i)
+
+    stories = []
+    for members in clusters.values():
+        representative = max(members, key=lambda i: len(results[i]["body"]))
+        urls = [results[representative]["href"]]
+        urls += [results[i]["href"] for i in members if results[i]["href"] not in urls]
+        stories.append({**results[representative], "urls": urls, "size": len(members), "rank": min(members)})
+    stories.sort(key=lambda story: (-story["size"], story["rank"]))
+    return stories
\ No newline at end of file
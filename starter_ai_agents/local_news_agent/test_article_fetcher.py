@@ -0,0 +1,190 @@
+import asyncio
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+import article_fetcher
+from article_fetcher import fetch_article, fetch_articles
+
+ARTICLE = (
+    "<html><head><script>var topic = 'semiconductors';</script></head><body>"
+    "<nav><p>Home News Markets Semiconductors Sports Weather Opinion Contact us today</p></nav>"
+    "<p>Chip makers reported that demand for semiconductors kept rising through the quarter.</p>"
+    "<footer><p>Copyright notice text that should never be part of the article content</p></footer>"
+    "</body></html>"
+).encode()
+FILLER = b"<p>A filler paragraph about the weather, which was sunny and mild for the season.</p>" * 100
+
+
+class ArticleHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Highest number of requests in progress at once, per host
+    peak = {}
+    active = {}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        host = self.headers["Host"].split(":")[0]
+        with self.lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+        try:
+            getattr(self, "page_" + self.path.strip("/").split("/")[0])()
+        except (AttributeError, TypeError):
+            self.send(404, b"", "text/plain")
+        except OSError:
+            # The client hung up
+            pass
+        finally:
+            with self.lock:
+                self.active[host] -= 1
+
+    def send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def page_article(self):
+        time.sleep(0.2)
+        self.send(200, ARTICLE, "text/html; charset=utf-8")
+
+    def page_pdf(self):
+        self.send(200, b"%PDF-1.4", "application/pdf")
+
+    def page_bogus_charset(self):
+        self.send(200, ARTICLE, "text/html; charset=x-no-such-charset")
+
+    def page_endless(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.end_headers()
+        for _ in range(1000):
+            self.wfile.write(FILLER)
+        self.close_connection = True
+
+    def page_trickle(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.end_headers()
+        for _ in range(50):
+            self.wfile.write(b"<p>")
+            self.wfile.flush()
+            time.sleep(0.1)
+        self.close_connection = True
+
+    def page_silent(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.end_headers()
+        self.wfile.flush()
+        time.sleep(3)
+        self.close_connection = True
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ArticleHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd.server_port
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def fetch(urls, topic="semiconductors demand"):
+    started = time.perf_counter()
+    articles = asyncio.run(fetch_articles(urls, topic))
+    return articles, time.perf_counter() - started
+
+
+def test_article_text_leaves_out_page_furniture(server):
+    url = f"http://127.0.0.1:{server}/article"
+
+    articles, _ = fetch([url])
+
+    assert articles == {url: "Chip makers reported that demand for semiconductors kept rising through the quarter."}
+
+
+def test_reading_stops_at_the_byte_cap(server):
+    async def read_capped():
+        async with httpx.AsyncClient() as client:
+            return await fetch_article(client, f"http://127.0.0.1:{server}/endless", {}, max_bytes=4096)
+
+    paragraphs = asyncio.run(read_capped())
+
+    assert paragraphs
+    assert sum(len(paragraph) for paragraph in paragraphs) <= 4096
+
+
+def test_each_host_gets_at_most_two_connections(server):
+    ArticleHandler.peak.clear()
+    urls = [f"http://127.0.0.1:{server}/article/{i}" for i in range(6)]
+    urls += [f"http://localhost:{server}/article/{i}" for i in range(6)]
+
+    articles, _ = fetch(urls)
+
+    assert set(articles) == set(urls)
+    assert ArticleHandler.peak == {"127.0.0.1": 2, "localhost": 2}
+
+
+def test_slow_page_is_abandoned_at_the_deadline(server, monkeypatch):
+    monkeypatch.setattr(article_fetcher, "ARTICLE_DEADLINE", 0.5)
+    fast, slow = f"http://127.0.0.1:{server}/article", f"http://127.0.0.1:{server}/trickle"
+
+    articles, elapsed = fetch([fast, slow])
+
+    assert set(articles) == {fast}
+    assert elapsed < 2
+
+
+def test_silent_page_hits_the_read_timeout(server, monkeypatch):
+    monkeypatch.setattr(article_fetcher, "READ_TIMEOUT", 0.3)
+
+    articles, elapsed = fetch([f"http://127.0.0.1:{server}/silent"])
+
+    assert articles == {}
+    assert elapsed < 2
+
+
+def test_non_html_pages_are_left_out(server):
+    url = f"http://127.0.0.1:{server}/pdf"
+
+    async def read():
+        async with httpx.AsyncClient() as client:
+            return await fetch_article(client, url, {})
+
+    with pytest.raises(ValueError, match="not an HTML page"):
+        asyncio.run(read())
+    assert fetch([url])[0] == {}
+
+
+def test_unknown_charset_is_read_as_utf8(server):
+    url = f"http://127.0.0.1:{server}/bogus_charset"
+
+    articles, _ = fetch([url])
+
+    assert "demand for semiconductors" in articles[url]
+
+
+def test_failed_pages_are_left_out_so_the_caller_keeps_the_snippet(server):
+    good = f"http://127.0.0.1:{server}/article"
+    missing = f"http://127.0.0.1:{server}/missing"
+    unreachable = f"http://127.0.0.1:{unused_port()}/article"
+
+    articles, _ = fetch([good, missing, unreachable, "not a url"])
+
+    assert set(articles) == {good}
\ No newline at end of file
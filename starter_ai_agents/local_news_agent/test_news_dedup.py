@@ -0,0 +1,66 @@
+from news_dedup import cluster_results
+
+WIRE = (
+    "The central bank raised interest rates by a quarter point on Wednesday, "
+    "citing persistent inflation and a strong labour market."
+)
+
+
+def result(href, title, body):
+    return {"title": title, "href": href, "body": body}
+
+
+def test_syndicated_copies_merge_into_one_story():
+    results = [
+        result("https://wire.example/rates", "Central bank raises rates", WIRE),
+        result("https://daily.example/rates", "Central bank raises rates", WIRE + " Markets fell."),
+        result("https://times.example/rates", "Central bank raises interest rates", WIRE),
+        result("https://sports.example/final", "City win the cup final", "City beat United 2-1 in the cup final at Wembley."),
+    ]
+
+    stories = cluster_results(results)
+
+    assert [story["size"] for story in stories] == [3, 1]
+    assert sorted(stories[0]["urls"]) == sorted(r["href"] for r in results[:3])
+    assert stories[1]["urls"] == ["https://sports.example/final"]
+
+
+def test_representative_is_the_longest_snippet_and_listed_first():
+    results = [
+        result("https://wire.example/rates", "Central bank raises rates", WIRE),
+        result("https://daily.example/rates", "Central bank raises rates", WIRE + " Markets fell on the news."),
+        result("https://times.example/rates", "Central bank raises rates", WIRE),
+    ]
+
+    [story] = cluster_results(results)
+
+    assert story["href"] == "https://daily.example/rates"
+    assert story["body"] == results[1]["body"]
+    assert story["urls"] == ["https://daily.example/rates", "https://wire.example/rates", "https://times.example/rates"]
+
+
+def test_stories_are_ordered_by_size_then_search_order():
+    results = [
+        result("https://a.example/storm", "Storm closes schools", "Heavy snow closed every school in the county on Monday morning."),
+        result("https://b.example/rates", "Central bank raises rates", WIRE),
+        result("https://c.example/bridge", "Bridge reopens after repairs", "The river bridge reopened to traffic after six months of repairs."),
+        result("https://d.example/rates", "Central bank raises rates", WIRE),
+    ]
+
+    stories = cluster_results(results)
+
+    assert [story["href"] for story in stories] == [
+        "https://b.example/rates",
+        "https://a.example/storm",
+        "https://c.example/bridge",
+    ]
+    assert [story["rank"] for story in stories] == [1, 0, 2]
+
+
+def test_threshold_keeps_related_but_different_stories_apart():
+    results = [
+        result("https://a.example/rates", "Central bank raises rates", WIRE),
+        result("https://b.example/rates", "Analysts expect the central bank to hold rates", "Most economists polled expect no change at the next meeting."),
+    ]
+
+    assert [story["size"] for story in cluster_results(results)] == [1, 1]
\ No newline at end of file
@@ -0,0 +1,71 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class CheckpointStore:
+    """
+    Persistent store for the output of each research stage, keyed by
+    conversation id, stage name and an optional key within the stage (such as
+    the search query of a summary). Values are stored as JSON. Conversations
+    not updated for `ttl_seconds` are removed.
+    """
+
+    def __init__(self, path, ttl_seconds=7 * 24 * 3600):
+        self.ttl_seconds = ttl_seconds
+        # Streamlit serves sessions from several threads; one lock guards the connection
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " conversation_id TEXT NOT NULL,"
+            " stage TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (conversation_id, stage, key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS checkpoints_updated_at ON checkpoints (updated_at)")
+        self._db.commit()
+
+    def get(self, conversation_id, stage, key=""):
+        """Returns the saved value, or None if the stage has not completed."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM checkpoints WHERE conversation_id = ? AND stage = ? AND key = ?",
+                (conversation_id, stage, key),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_all(self, conversation_id, stage):
+        """Returns every saved value of a stage as a dict keyed by its key."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, value FROM checkpoints WHERE conversation_id = ? AND stage = ?",
+                (conversation_id, stage),
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def set(self, conversation_id, stage, value, key=""):
+        """Saves the output of a stage, replacing any earlier value."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO checkpoints (conversation_id, stage, key, value, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (conversation_id, stage, key, json.dumps(value), now),
+            )
+            self._db.execute(
+                "DELETE FROM checkpoints WHERE conversation_id IN ("
+                " SELECT conversation_id FROM checkpoints GROUP BY conversation_id HAVING MAX(updated_at) < ?)",
+                (now - self.ttl_seconds,),
+            )
+            self._db.commit()
+
+    def clear(self, conversation_id):
+        """Removes every checkpoint of a conversation."""
+        with self._lock:
+            self._db.execute("DELETE FROM checkpoints WHERE conversation_id = ?", (conversation_id,))
+            self._db.commit()
\ No newline at end of file
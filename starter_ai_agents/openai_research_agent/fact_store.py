@@ -0,0 +1,216 @@
+import hashlib
+import random
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Facts whose word sets have at least this Jaccard similarity are near-duplicates
+NEAR_DUPLICATE_THRESHOLD = 0.6
+# MinHash signatures are split into BANDS bands of ROWS_PER_BAND values; facts sharing
+# any band are candidates. 16 x 4 finds pairs above ~0.5 similarity with high probability.
+BANDS = 16
+ROWS_PER_BAND = 4
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(BANDS * ROWS_PER_BAND)
+]
+
+UNKNOWN_SOURCE = "Not specified"
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src")
+
+
+def normalize_topic(topic):
+    """Case-folds a topic and collapses whitespace and trailing punctuation, for the per-topic index."""
+    return re.sub(r"\s+", " ", (topic or "").strip().casefold()).rstrip(" ?!.")
+
+
+def normalize_source(source):
+    """
+    Normalizes a source so the same page is recorded once: URLs lose their
+    scheme case, "www.", fragment, tracking parameters and trailing slash;
+    other sources are only trimmed.
+    """
+    source = (source or "").strip()
+    if not source or source.casefold() in ("none", "n/a", UNKNOWN_SOURCE.casefold()):
+        return UNKNOWN_SOURCE
+    if not re.match(r"https?://", source, re.IGNORECASE):
+        return source
+
+    parts = urlsplit(source)
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ])
+    return urlunsplit(("https", host, parts.path.rstrip("/"), query, ""))
+
+
+def fact_terms(text):
+    """The set of words in a fact, which near-duplicate detection compares."""
+    return set(_WORD.findall(text.lower()))
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash(terms):
+    """MinHash signature of a set of words; equal positions estimate their Jaccard similarity."""
+    hashes = [_hash64(term) for term in terms] or [0]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def lsh_buckets(signature):
+    """One bucket id per band of the signature, as signed 64-bit integers for SQLite."""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        buckets.append(_hash64(",".join(map(str, rows))) - (1 << 63))
+    return buckets
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def _fts_query(text):
+    """FTS5 query matching any of the words in `text`, with quoting so user input is never parsed as syntax."""
+    return " OR ".join(f'"{word}"' for word in dict.fromkeys(_WORD.findall(text.lower())))
+
+
+class FactStore:
+    """
+    Persistent store for facts saved during research.
+    Facts live in SQLite (WAL mode) with an FTS5 full-text index and a per-topic
+    index. Candidate near-duplicates are found through MinHash LSH buckets, and a
+    new fact whose words overlap a candidate's by NEAR_DUPLICATE_THRESHOLD (Jaccard)
+    or more is treated as a duplicate of it and not stored again.
+    """
+
+    def __init__(self, path):
+        # Streamlit serves sessions from several threads; one lock guards the connection
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS facts ("
+            " id INTEGER PRIMARY KEY,"
+            " topic TEXT NOT NULL,"
+            " topic_key TEXT NOT NULL,"
+            " fact TEXT NOT NULL,"
+            " source TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS facts_topic ON facts (topic_key, id)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS fact_buckets ("
+            " band INTEGER NOT NULL,"
+            " bucket INTEGER NOT NULL,"
+            " fact_id INTEGER NOT NULL REFERENCES facts (id))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS fact_buckets_lookup ON fact_buckets (band, bucket)")
+        try:
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts"
+                " USING fts5(fact, topic, content='facts', content_rowid='id')"
+            )
+            self.full_text = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: search falls back to LIKE
+            self.full_text = False
+        self._db.commit()
+
+    def _find_near_duplicate(self, terms, buckets):
+        rows = self._db.execute(
+            "SELECT DISTINCT facts.* FROM fact_buckets JOIN facts ON facts.id = fact_buckets.fact_id WHERE "
+            + " OR ".join("(band = ? AND bucket = ?)" for _ in buckets),
+            [value for band, bucket in enumerate(buckets) for value in (band, bucket)],
+        ).fetchall()
+        best = max(rows, key=lambda row: jaccard(terms, fact_terms(row["fact"])), default=None)
+        if best is not None and jaccard(terms, fact_terms(best["fact"])) >= NEAR_DUPLICATE_THRESHOLD:
+            return best
+        return None
+
+    def add(self, topic, fact, source=None):
+        """
+        Stores a fact unless a near-duplicate is already stored.
+        Returns (fact, is_new), where fact is the stored dict (the existing one for a duplicate).
+        """
+        fact = " ".join(fact.split())
+        terms = fact_terms(fact)
+        buckets = lsh_buckets(minhash(terms))
+        now = time.time()
+        with self._lock:
+            existing = self._find_near_duplicate(terms, buckets)
+            if existing is not None:
+                return self._to_dict(existing), False
+
+            cursor = self._db.execute(
+                "INSERT INTO facts (topic, topic_key, fact, source, created_at) VALUES (?, ?, ?, ?, ?)",
+                (topic, normalize_topic(topic), fact, normalize_source(source), now),
+            )
+            fact_id = cursor.lastrowid
+            self._db.executemany(
+                "INSERT INTO fact_buckets (band, bucket, fact_id) VALUES (?, ?, ?)",
+                [(band, bucket, fact_id) for band, bucket in enumerate(buckets)],
+            )
+            if self.full_text:
+                self._db.execute(
+                    "INSERT INTO facts_fts (rowid, fact, topic) VALUES (?, ?, ?)", (fact_id, fact, topic)
+                )
+            self._db.commit()
+            row = self._db.execute("SELECT * FROM facts WHERE id = ?", (fact_id,)).fetchone()
+            return self._to_dict(row), True
+
+    def search(self, query, limit=10):
+        """Stored facts matching any word of `query`, best matches first."""
+        words = list(dict.fromkeys(_WORD.findall(query.lower())))
+        if not words:
+            return []
+        with self._lock:
+            if self.full_text:
+                rows = self._db.execute(
+                    "SELECT facts.* FROM facts_fts JOIN facts ON facts.id = facts_fts.rowid"
+                    " WHERE facts_fts MATCH ? ORDER BY bm25(facts_fts) LIMIT ?",
+                    (_fts_query(query), limit),
+                ).fetchall()
+            else:
+                rows = self._db.execute(
+                    "SELECT * FROM facts WHERE " + " OR ".join("lower(fact) LIKE ?" for _ in words)
+                    + " ORDER BY id DESC LIMIT ?",
+                    [f"%{word}%" for word in words] + [limit],
+                ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def facts_for_topic(self, topic, limit=100):
+        """The most recent facts saved while researching `topic`."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM facts WHERE topic_key = ? ORDER BY id DESC LIMIT ?",
+                (normalize_topic(topic), limit),
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def stats(self):
+        """Returns the number of stored facts and topics."""
+        with self._lock:
+            facts, topics = self._db.execute("SELECT COUNT(*), COUNT(DISTINCT topic_key) FROM facts").fetchone()
+            return {"facts": facts, "topics": topics}
+
+    @staticmethod
+    def _to_dict(row):
+        return {
+            "id": row["id"],
+            "topic": row["topic"],
+            "fact": row["fact"],
+            "source": row["source"],
+            "timestamp": time.strftime("%H:%M:%S", time.localtime(row["created_at"])),
+        }
\ No newline at end of file
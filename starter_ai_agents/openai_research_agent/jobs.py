@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class Job:
+    """
+    A background job and its progress log.
+    The job appends events with emit(); readers poll events_since() from any
+    thread. Events with a `key` update an earlier event with the same key, so
+    per-item progress lines can change in place.
+    """
+
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._events = []
+        self._lock = threading.Lock()
+        self._task = None
+
+    def emit(self, kind, text=None, key=None, **data):
+        """Appends an event such as ("message", "Planning...") to the job's log."""
+        event = {"kind": kind, "text": text, "key": key, "time": time.time(), **data}
+        with self._lock:
+            self._events.append(event)
+
+    def events_since(self, index=0):
+        """Returns the events logged from position `index` on."""
+        with self._lock:
+            return list(self._events[index:])
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+
+class JobRunner:
+    """
+    Runs coroutine jobs on an event loop in a background thread, so they outlive
+    the Streamlit script run (and browser session) that submitted them.
+    At most `max_concurrent_jobs` run at a time; the rest wait in the queue.
+    The most recent `max_finished_jobs` finished jobs are kept for result retrieval.
+    """
+
+    def __init__(self, max_concurrent_jobs=4, max_finished_jobs=200):
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_finished_jobs = max_finished_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._slots = None
+        self._thread = threading.Thread(target=self._run_loop, name="research-jobs", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._slots = asyncio.Semaphore(self.max_concurrent_jobs)
+        self._loop.run_forever()
+
+    async def _run_job(self, job, coroutine_function, args, kwargs):
+        try:
+            async with self._slots:
+                job.status = RUNNING
+                job.started_at = time.time()
+                job.result = await coroutine_function(job, *args, **kwargs)
+                job.status = DONE
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+            job.emit("message", "🛑 Cancelled.")
+        except Exception as e:
+            job.status = FAILED
+            job.error = f"{e}\n{traceback.format_exc()}"
+            job.emit("error", str(e))
+        finally:
+            job.finished_at = time.time()
+            self._forget_old_jobs()
+
+    def _forget_old_jobs(self):
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+            for job_id in finished[:-self.max_finished_jobs or None]:
+                del self._jobs[job_id]
+
+    def submit(self, name, coroutine_function, *args, **kwargs):
+        """
+        Schedules `coroutine_function(job, *args, **kwargs)` and returns the job id
+        immediately. The job's return value becomes its result.
+        """
+        job = Job(name)
+        with self._lock:
+            self._jobs[job.id] = job
+
+        def start():
+            job._task = self._loop.create_task(self._run_job(job, coroutine_function, args, kwargs))
+
+        self._loop.call_soon_threadsafe(start)
+        return job.id
+
+    def get(self, job_id):
+        """Returns the job, or None if the id is unknown or the job has been forgotten."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancels a queued or running job. Returns False if it has already finished."""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+
+        def cancel_task():
+            if job._task is not None:
+                job._task.cancel()
+
+        self._loop.call_soon_threadsafe(cancel_task)
+        return True
+
+    def stats(self):
+        """Returns the number of jobs in each status."""
+        with self._lock:
+            counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED, CANCELLED)}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
\ No newline at end of file
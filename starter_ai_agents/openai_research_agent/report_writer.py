@@ -0,0 +1,160 @@
+import asyncio
+import json
+import re
+
+from agents import Agent, Runner
+from pydantic import BaseModel
+
+# Number of report sections written at the same time
+MAX_CONCURRENT_SECTIONS = 4
+# Attempts per section before falling back to its research notes
+SECTION_ATTEMPTS = 3
+# Research findings passed to each section writer
+MAX_FINDINGS_PER_SECTION = 3
+
+_WORD = re.compile(r"[a-z0-9]+")
+_URL = re.compile(r"https?://[^\s)\]>\"']+")
+
+# Words that carry no signal when matching sections with research findings
+STOPWORDS = {
+    "a", "about", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "overview", "section", "the", "this", "to", "what", "which", "with",
+}
+
+
+class OutlineSection(BaseModel):
+    heading: str
+    description: str
+
+class ReportOutline(BaseModel):
+    title: str
+    sections: list[OutlineSection]
+
+
+outline_agent = Agent(
+    name="Outline Agent",
+    instructions="You are a senior researcher planning a report for a research query. You will be "
+    "provided with the original query, the research plan, and the findings of the research "
+    "assistants as JSON.\n"
+    "Come up with a title and an outline of 5-8 sections that describes the structure and flow of "
+    "the report, starting with an introduction and ending with a conclusion. For each section, give "
+    "its heading and a one or two sentence description of what it covers, using the same terms as "
+    "the findings it draws on.",
+    model="gpt-4o-mini",
+    output_type=ReportOutline,
+)
+
+section_agent = Agent(
+    name="Section Writer Agent",
+    instructions="You are a senior researcher writing one section of a research report. You will be "
+    "provided with the report title, the full outline, the section to write, and the research "
+    "relevant to it.\n"
+    "Write only that section, in markdown, without repeating its heading. Use only the research "
+    "provided, be detailed and specific, and cite sources as markdown links where the research has "
+    "them. Aim for 200-400 words.",
+    model="gpt-4o-mini",
+)
+
+
+def _terms(text):
+    return {word for word in _WORD.findall(text.lower()) if word not in STOPWORDS and len(word) > 2}
+
+
+def relevant_findings(section, findings, limit=MAX_FINDINGS_PER_SECTION):
+    """
+    The findings that share the most terms with a section's heading and description,
+    or all findings if none of them match (e.g. for the introduction).
+    """
+    section_terms = _terms(f"{section.heading} {section.description}")
+    scored = [
+        (len(section_terms & _terms(f"{finding['query']} {finding['summary']}")), index)
+        for index, finding in enumerate(findings)
+    ]
+    matched = sorted((entry for entry in scored if entry[0] > 0), reverse=True)[:limit]
+    if not matched:
+        return findings
+    return [findings[index] for _, index in sorted(matched, key=lambda entry: entry[1])]
+
+
+async def plan_report(editor_input):
+    """Asks the outline agent for the report title and sections. Returns a ReportOutline."""
+    result = await Runner.run(outline_agent, editor_input)
+    return result.final_output_as(ReportOutline)
+
+
+def _section_prompt(outline, section, findings):
+    return "\n".join([
+        f"Report title: {outline.title}",
+        "Outline:",
+        *(f"{index}. {item.heading}" for index, item in enumerate(outline.sections, start=1)),
+        "",
+        f"Section to write: {section.heading}",
+        f"It covers: {section.description}",
+        "",
+        "Research:",
+        json.dumps(findings, indent=2),
+    ])
+
+
+async def write_section(outline, section, findings, semaphore, on_status):
+    """
+    Writes one section, retrying it on its own if the run fails. After
+    SECTION_ATTEMPTS failures the section is filled with its research notes
+    so the rest of the report is not lost.
+    """
+    relevant = relevant_findings(section, findings)
+    async with semaphore:
+        for attempt in range(1, SECTION_ATTEMPTS + 1):
+            on_status(section, f"✍️ Writing section: *{section.heading}*" + (f" (attempt {attempt})" if attempt > 1 else ""))
+            try:
+                result = await Runner.run(section_agent, _section_prompt(outline, section, relevant))
+                body = str(result.final_output).strip()
+                if body:
+                    on_status(section, f"✅ Section written: *{section.heading}*")
+                    return body
+            except Exception as e:
+                on_status(section, f"🔁 Section failed, retrying: *{section.heading}* ({e})")
+                await asyncio.sleep(2 ** (attempt - 1))
+
+    on_status(section, f"⚠️ Could not write section: *{section.heading}*, using research notes")
+    return "\n\n".join(finding["summary"] for finding in relevant)
+
+
+async def write_sections(outline, findings, on_status, max_concurrency=MAX_CONCURRENT_SECTIONS):
+    """Writes all sections of the outline concurrently. Returns the section bodies in outline order."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    return await asyncio.gather(*[
+        write_section(outline, section, findings, semaphore, on_status)
+        for section in outline.sections
+    ])
+
+
+def collect_sources(texts):
+    """Unique URLs in the given texts, in order of first appearance."""
+    sources = {}
+    for text in texts:
+        for url in _URL.findall(text or ""):
+            sources.setdefault(url.rstrip(".,;:"), None)
+    return list(sources)
+
+
+def assemble_report(outline, bodies, findings, facts):
+    """
+    Stitches the sections into one markdown report and computes the word count
+    and sources locally. Returns a dict with the ResearchReport fields.
+    """
+    report = "\n\n".join(
+        f"## {section.heading}\n\n{body}" for section, body in zip(outline.sections, bodies)
+    )
+    sources = collect_sources(
+        [report]
+        + [finding["summary"] for finding in findings]
+        + [fact["source"] for fact in facts]
+    )
+    return {
+        "title": outline.title,
+        "outline": [section.heading for section in outline.sections],
+        "report": report,
+        "sources": sources,
+        "word_count": len(report.split()),
+    }
\ No newline at end of file
@@ -1,19 +1,78 @@
 import os
+import time
 import uuid
-import asyncio
 import streamlit as st
-from datetime import datetime
-
-from agents import (
-    Agent, 
-    Runner, 
-    WebSearchTool, 
-    function_tool, 
-    handoff, 
-    trace,
-)
 
-from pydantic import BaseModel
+from agents import add_trace_processor, set_trace_processors
+
+from checkpoints import CheckpointStore
+from fact_store import FactStore
+from jobs import CANCELLED, FAILED, JobRunner
+from research_index import ResearchIndex
+from research_pipeline import ResearchReport, run_research
+from trace_store import LATENCY_WINDOW_TRACES, TraceStore, trace_report
+
+# Facts saved by every research run, shared across sessions and restarts
+FACT_STORE_PATH = os.environ.get("RESEARCH_FACT_STORE_PATH", "research_facts.sqlite3")
+# Output of each research stage, so a rerun resumes where the last one stopped
+CHECKPOINT_PATH = os.environ.get("RESEARCH_CHECKPOINT_PATH", "research_checkpoints.sqlite3")
+# Summaries of recent research, reused for matching queries instead of a new web search
+RESEARCH_INDEX_PATH = os.environ.get("RESEARCH_INDEX_PATH", "research_index.sqlite3")
+RESEARCH_INDEX_MAX_AGE_SECONDS = float(os.environ.get("RESEARCH_INDEX_MAX_AGE_HOURS", "24")) * 3600
+RESEARCH_INDEX_MIN_RECALL = float(os.environ.get("RESEARCH_INDEX_MIN_RECALL", "0.8"))
+# Research jobs running at the same time in this process, across all sessions
+MAX_CONCURRENT_JOBS = int(os.environ.get("RESEARCH_MAX_CONCURRENT_JOBS", "4"))
+# Seconds between progress refreshes while a research job runs
+POLL_INTERVAL_SECONDS = 1
+# Local copy of every trace; with RESEARCH_TRACING=local, traces are only kept locally
+TRACE_STORE_PATH = os.environ.get("RESEARCH_TRACE_STORE_PATH", "research_traces.sqlite3")
+TRACE_JSONL_PATH = os.environ.get("RESEARCH_TRACE_JSONL_PATH")
+# Older traces are removed from the local store
+TRACE_MAX_TRACES = int(os.environ.get("RESEARCH_TRACE_MAX_TRACES", "1000"))
+TRACING_MODE = os.environ.get("RESEARCH_TRACING", "both")
+
+
+@st.cache_resource(show_spinner=False)
+def get_fact_store():
+    """Returns the process-wide fact store, shared by every session."""
+    return FactStore(FACT_STORE_PATH)
+
+
+@st.cache_resource(show_spinner=False)
+def get_checkpoint_store():
+    """Returns the process-wide store of research stage checkpoints."""
+    return CheckpointStore(CHECKPOINT_PATH)
+
+
+@st.cache_resource(show_spinner=False)
+def get_research_index():
+    """Returns the process-wide index of recent research summaries."""
+    return ResearchIndex(
+        RESEARCH_INDEX_PATH,
+        max_age_seconds=RESEARCH_INDEX_MAX_AGE_SECONDS,
+        min_recall=RESEARCH_INDEX_MIN_RECALL,
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_runner():
+    """Returns the process-wide runner for research jobs, which outlive the sessions that start them."""
+    return JobRunner(max_concurrent_jobs=MAX_CONCURRENT_JOBS)
+
+
+@st.cache_resource(show_spinner=False)
+def get_trace_store():
+    """Returns the local trace store, registered once per process as a tracing processor."""
+    store = TraceStore(TRACE_STORE_PATH, jsonl_path=TRACE_JSONL_PATH, max_traces=TRACE_MAX_TRACES)
+    if TRACING_MODE == "local":
+        # Replaces the exporter to the hosted dashboard
+        set_trace_processors([store])
+    else:
+        add_trace_processor(store)
+    return store
+
+
+get_trace_store()
 
 
 # Set up page configuration
@@ -37,7 +96,7 @@ with st.sidebar:
         help="Enter your OpenAI API Key to run the agents."
     )
 
-    # Check for API key *before* initializing agents or running anything
+    # Check for API key *before* running anything
     if not openai_api_key:
         st.warning("👈 Please enter your OpenAI API Key to start.")
         st.stop()
@@ -45,6 +104,33 @@ with st.sidebar:
     # Set the environment variable for the Agents SDK to use
     os.environ["OPENAI_API_KEY"] = openai_api_key
 
+    parallel_sections = st.toggle(
+        "Write report sections in parallel",
+        value=True,
+        help="Outline the report first, then write each section concurrently from the research relevant to it. "
+        "Turn off to have the Editor Agent write the whole report in one pass."
+    )
+
+    reuse_research = st.toggle(
+        "Reuse recent research",
+        value=True,
+        help="Search queries that research from the last hours already covers reuse that summary "
+        "instead of searching the web again."
+    )
+    index_stats = get_research_index().stats()
+    st.caption(
+        f"Recent research: {index_stats['documents']} summaries, "
+        f"{index_stats['hits']} reused / {index_stats['misses']} searched"
+    )
+
+    with st.expander("Saved Facts"):
+        fact_stats = get_fact_store().stats()
+        st.caption(f"{fact_stats['facts']} facts from {fact_stats['topics']} topics")
+        fact_query = st.text_input("Search saved facts:")
+        if fact_query:
+            for saved in get_fact_store().search(fact_query):
+                st.markdown(f"- {saved['fact']} ({saved['source']})")
+
     st.divider()
     st.header("Research Topic")
     user_topic = st.text_input(
@@ -77,223 +163,110 @@ This app demonstrates the power of OpenAI's Agents SDK by creating a multi-agent
 that researches news topics and generates comprehensive research reports.
 """)
 
-# Define data models
-class ResearchPlan(BaseModel):
-    topic: str
-    search_queries: list[str]
-    focus_areas: list[str]
-
-class ResearchReport(BaseModel):
-    title: str
-    outline: list[str]
-    report: str
-    sources: list[str]
-    word_count: int
-
-# Custom tool for saving facts found during research
-@function_tool
-def save_important_fact(fact: str, source: str = None) -> str:
-    """Save an important fact discovered during research.
-    
-    Args:
-        fact: The important fact to save
-        source: Optional source of the fact
-    
-    Returns:
-        Confirmation message
-    """
-    if "collected_facts" not in st.session_state:
-        st.session_state.collected_facts = []
-    
-    st.session_state.collected_facts.append({
-        "fact": fact,
-        "source": source or "Not specified",
-        "timestamp": datetime.now().strftime("%H:%M:%S")
-    })
-    
-    return f"Fact saved: {fact}"
-
-# Define the agents
-# NOTE: The agents are defined here *after* the API key is set in os.environ
-research_agent = Agent(
-    name="Research Agent",
-    instructions="You are a research assistant. Given a search term, you search the web for that term and"
-    "produce a concise summary of the results. The summary must 2-3 paragraphs and less than 300"
-    "words. Capture the main points. Write succintly, no need to have complete sentences or good"
-    "grammar. This will be consumed by someone synthesizing a report, so its vital you capture the"
-    "essence and ignore any fluff. Do not include any additional commentary other than the summary"
-    "itself.",
-    model="gpt-4o-mini",
-    tools=[
-        WebSearchTool(),
-        save_important_fact
-    ],
-)
-
-editor_agent = Agent(
-    name="Editor Agent",
-    handoff_description="A senior researcher who writes comprehensive research reports",
-    instructions="You are a senior researcher tasked with writing a cohesive report for a research query. "
-    "You will be provided with the original query, and some initial research done by a research "
-    "assistant.\n"
-    "You should first come up with an outline for the report that describes the structure and "
-    "flow of the report. Then, generate the report and return that as your final output.\n"
-    "The final output should be in markdown format, and it should be lengthy and detailed. Aim "
-    "for 5-10 pages of content, at least 1000 words.",
-    model="gpt-4o-mini",
-    output_type=ResearchReport,
-)
-
-triage_agent = Agent(
-    name="Triage Agent",
-    instructions="""You are the coordinator of this research operation. Your job is to:
-    1. Understand the user's research topic
-    2. Create a research plan with the following elements:
-        - topic: A clear statement of the research topic
-        - search_queries: A list of 3-5 specific search queries that will help gather information
-        - focus_areas: A list of 3-5 key aspects of the topic to investigate
-    3. Hand off to the Research Agent to collect information
-    4. After research is complete, hand off to the Editor Agent who will write a comprehensive report
-    
-    Make sure to return your plan in the expected structured format with topic, search_queries, and focus_areas.
-    """,
-    handoffs=[
-        handoff(research_agent),
-        handoff(editor_agent)
-    ],
-    model="gpt-4o-mini",
-    output_type=ResearchPlan,
-)
-
-
 # Main content area with two tabs
-tab1, tab2 = st.tabs(["Research Process", "Report"])
+tab1, tab2, tab3 = st.tabs(["Research Process", "Report", "Performance"])
 
 # Initialize session state for storing results
 if "conversation_id" not in st.session_state:
-    st.session_state.conversation_id = str(uuid.uuid4().hex[:16])
-if "collected_facts" not in st.session_state:
-    st.session_state.collected_facts = []
+    # Kept in the URL so a browser refresh resumes the same conversation's checkpoints and job
+    st.session_state.conversation_id = st.query_params.get("conversation") or str(uuid.uuid4().hex[:16])
+    st.query_params["conversation"] = st.session_state.conversation_id
+if "job_id" not in st.session_state:
+    st.session_state.job_id = st.query_params.get("job")
 if "research_done" not in st.session_state:
     st.session_state.research_done = False
 if "report_result" not in st.session_state:
     st.session_state.report_result = None
+    saved_report = get_checkpoint_store().get(st.session_state.conversation_id, "report")
+    if saved_report:
+        st.session_state.report_result = ResearchReport(**saved_report)
+        st.session_state.research_done = True
 
-# Main research function
-async def run_research(topic):
-    # Reset state for new research
-    st.session_state.collected_facts = []
-    st.session_state.research_done = False
-    st.session_state.report_result = None
+def render_job_events(events):
+    """Renders a job's progress log; an event with a key replaces the earlier one with the same key."""
+    items, positions = [], {}
+    for event in events:
+        if event["key"] in positions:
+            items[positions[event["key"]]] = event
+            continue
+        if event["key"] is not None:
+            positions[event["key"]] = len(items)
+        items.append(event)
     
-    with tab1:
-        message_container = st.container()
-        
-    # Create error handling container
-    error_container = st.empty()
-        
-    # Create a trace for the entire workflow
-    with trace("News Research", group_id=st.session_state.conversation_id):
-        # Start with the triage agent
-        with message_container:
-            st.write("🔍 **Triage Agent**: Planning research approach...")
-        
-        triage_result = await Runner.run(
-            triage_agent,
-            f"Research this topic thoroughly: {topic}. This research will be used to create a comprehensive research report."
-        )
-        
-        # Check if the result is a ResearchPlan object or a string
-        if hasattr(triage_result.final_output, 'topic'):
-            research_plan = triage_result.final_output
-            plan_display = {
-                "topic": research_plan.topic,
-                "search_queries": research_plan.search_queries,
-                "focus_areas": research_plan.focus_areas
-            }
+    facts_shown = False
+    for event in items:
+        if event["kind"] == "fact":
+            if not facts_shown:
+                st.write("📚 **Collected Facts**:")
+                facts_shown = True
+            st.info(f"**Fact**: {event['text']}\n\n**Source**: {event['source']}")
+        elif event["kind"] == "plan":
+            st.write(event["text"])
+            st.json(event["plan"])
+        elif event["kind"] == "preview":
+            st.write("📄 **Report Preview**:")
+            st.markdown(event["text"])
+            st.write("*See the Report tab for the full document.*")
+        elif event["kind"] == "error":
+            st.error(event["text"])
         else:
-            # Fallback if we don't get the expected output type
-            research_plan = {
-                "topic": topic,
-                "search_queries": ["Researching " + topic],
-                "focus_areas": ["General information about " + topic]
-            }
-            plan_display = research_plan
-        
-        with message_container:
-            st.write("📋 **Research Plan**:")
-            st.json(plan_display)
-        
-        # Display facts as they're collected
-        fact_placeholder = message_container.empty()
-        
-        # Check for new facts periodically
-        previous_fact_count = 0
-        for i in range(15):  # Check more times to allow for more comprehensive research
-            current_facts = len(st.session_state.collected_facts)
-            if current_facts > previous_fact_count:
-                with fact_placeholder.container():
-                    st.write("📚 **Collected Facts**:")
-                    for fact in st.session_state.collected_facts:
-                        st.info(f"**Fact**: {fact['fact']}\n\n**Source**: {fact['source']}")
-                previous_fact_count = current_facts
-            await asyncio.sleep(1)
-        
-        # Editor Agent phase
-        with message_container:
-            st.write("📝 **Editor Agent**: Creating comprehensive research report...")
-        
-        try:
-            report_result = await Runner.run(
-                editor_agent,
-                triage_result.to_input_list()
-            )
-            
-            st.session_state.report_result = report_result.final_output
-            
-            with message_container:
-                st.write("✅ **Research Complete! Report Generated.**")
-                
-                # Preview a snippet of the report
-                if hasattr(report_result.final_output, 'report'):
-                    report_preview = report_result.final_output.report[:300] + "..."
-                else:
-                    report_preview = str(report_result.final_output)[:300] + "..."
-                    
-                st.write("📄 **Report Preview**:")
-                st.markdown(report_preview)
-                st.write("*See the Report tab for the full document.*")
-                
-        except Exception as e:
-            st.error(f"Error generating report: {str(e)}")
-            # Fallback to display raw agent response
-            if hasattr(triage_result, 'new_items'):
-                messages = [item for item in triage_result.new_items if hasattr(item, 'content')]
-                if messages:
-                    raw_content = "\n\n".join([str(m.content) for m in messages if m.content])
-                    st.session_state.report_result = raw_content
-                    
-                    with message_container:
-                        st.write("⚠️ **Research completed but there was an issue generating the structured report.**")
-                        st.write("Raw research results are available in the Report tab.")
-    
+            st.write(event["text"])
+
+def collect_job_result(job):
+    """Moves a finished job's outcome into the session so the Report tab shows it."""
+    if job.status == FAILED:
+        # Set a basic report result so the user gets something
+        error = str(job.error).splitlines()[0]
+        st.session_state.report_result = f"# Research on {job.name}\n\nUnfortunately, an error occurred during the research process. Please try again later or with a different topic.\n\nError details: {error}"
+    elif job.status == CANCELLED:
+        st.session_state.report_result = None
+    else:
+        st.session_state.report_result = job.result
     st.session_state.research_done = True
 
-# Run the research when the button is clicked
+# Start a research job when the button is clicked; it runs in the background,
+# so reruns, refreshes and closed tabs do not interrupt it
 if start_button:
-    with st.spinner(f"Researching: {user_topic}"):
-        try:
-            # We use a custom run_research in the asyncio event loop
-            # and then handle the subsequent button clicks after
-            asyncio.run(run_research(user_topic))
-        except Exception as e:
-            st.error(f"An error occurred during research: {str(e)}")
-            # Set a basic report result so the user gets something
-            st.session_state.report_result = f"# Research on {user_topic}\n\nUnfortunately, an error occurred during the research process. Please try again later or with a different topic.\n\nError details: {str(e)}"
-            st.session_state.research_done = True
-        finally:
-            # Re-run the app to update the Report tab immediately
-            st.rerun()
+    st.session_state.job_id = get_job_runner().submit(
+        user_topic,
+        run_research,
+        user_topic,
+        st.session_state.conversation_id,
+        parallel_sections,
+        get_fact_store(),
+        get_checkpoint_store(),
+        get_research_index() if reuse_research else None,
+    )
+    st.query_params["job"] = st.session_state.job_id
+    st.session_state.research_done = False
+    st.session_state.report_result = None
+
+job = get_job_runner().get(st.session_state.job_id) if st.session_state.job_id else None
+
+# The progress log polls the job while it runs
+@st.fragment(run_every=POLL_INTERVAL_SECONDS if job is not None and not job.finished else None)
+def show_research_progress():
+    job = get_job_runner().get(st.session_state.job_id) if st.session_state.job_id else None
+    if job is None:
+        if st.session_state.job_id and not st.session_state.research_done:
+            st.info("This research job is no longer available. Start the research again to resume it.")
+        return
+    
+    render_job_events(job.events_since(0))
+    if not job.finished:
+        st.caption("⏳ Research is running in the background; you can refresh or close this page and come back.")
+        if st.button("Cancel Research"):
+            get_job_runner().cancel(job.id)
+    elif job.status == CANCELLED:
+        st.warning("Research was cancelled. Start it again to resume from the last completed stage.")
+    
+    if job.finished and not st.session_state.research_done:
+        collect_job_result(job)
+        # Re-run the whole app to update the Report tab
+        st.rerun()
+
+with tab1:
+    show_research_progress()
 
 # Display results in the Report tab
 with tab2:
@@ -301,7 +274,7 @@ with tab2:
         report = st.session_state.report_result
         
         # Handle different possible types of report results
-        if hasattr(report, 'title'):
+        if isinstance(report, ResearchReport):
             # We have a properly structured ResearchReport object
             title = report.title
             
@@ -354,4 +327,42 @@ with tab2:
                 mime="text/markdown"
             )
     else:
-        st.info("Start a research job by entering a topic and clicking 'Start Research'.")
\ No newline at end of file
+        st.info("Start a research job by entering a topic and clicking 'Start Research'.")
+
+# Display the latest trace of this conversation in the Performance tab
+with tab3:
+    latest_trace = get_trace_store().latest_trace(st.session_state.conversation_id)
+    if latest_trace is None:
+        st.info("Run a research job to see where its time was spent.")
+    else:
+        profile = trace_report(get_trace_store(), latest_trace["trace_id"])
+        breakdown = profile["breakdown"]
+        duration = (latest_trace["ended_at"] or time.time()) - latest_trace["started_at"]
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Duration", f"{duration:.1f}s")
+        col2.metric("Model wait", f"{breakdown['model_seconds']:.1f}s", f"{breakdown['model_share']:.0%} of waiting", delta_color="off")
+        col3.metric("Tool wait", f"{breakdown['tool_seconds']:.1f}s", f"{breakdown['tool_share']:.0%} of waiting", delta_color="off")
+        col4.metric("Tokens", f"{breakdown['input_tokens']:,} in / {breakdown['output_tokens']:,} out")
+        st.caption("Web searches run inside model responses and count as model wait. Parallel spans are all counted.")
+        
+        st.subheader("Critical Path")
+        st.dataframe(
+            [
+                {
+                    "Span": "\u2003" * step["depth"] + step["name"],
+                    "Type": step["type"],
+                    "Starts at (s)": round(step["start"], 2),
+                    "Duration (s)": round(step["seconds"], 2),
+                }
+                for step in profile["critical_path"]
+            ],
+        )
+        
+        st.subheader(f"Agent Latency (last {LATENCY_WINDOW_TRACES} traces)")
+        st.dataframe(
+            [
+                {"Agent": row["agent"], "Runs": row["runs"], "p50 (s)": round(row["p50"], 2), "p95 (s)": round(row["p95"], 2)}
+                for row in profile["agent_latencies"]
+            ],
+        )
@@ -0,0 +1,141 @@
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Words that carry no signal when matching a search query with stored research
+STOPWORDS = {
+    "a", "about", "an", "and", "are", "as", "at", "be", "best", "by", "for", "from", "how", "in",
+    "is", "it", "of", "on", "or", "the", "this", "to", "vs", "what", "which", "with",
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def index_terms(text):
+    """Words of `text` used for indexing, without stopwords and with a plural "s" stripped."""
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+class ResearchIndex:
+    """
+    Local BM25 index over research summaries, persisted in SQLite (WAL mode).
+    The hosted web search tool does not expose the pages it reads, so the index
+    holds what the research agents produced from them: one document per search
+    query with its summary. The inverted index lives in memory and is rebuilt
+    from the fresh documents on start.
+
+    lookup() returns a stored summary only when it is recent enough and recalls
+    the query well: at least `min_recall` of the query's terms appear in it.
+    """
+
+    def __init__(self, path, max_age_seconds=24 * 3600, min_recall=0.8):
+        self.max_age_seconds = max_age_seconds
+        self.min_recall = min_recall
+        self.hits = 0
+        self.misses = 0
+
+        self._docs = {}
+        self._postings = defaultdict(dict)
+        self._total_length = 0
+        # Research jobs add documents while other sessions look them up
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " id INTEGER PRIMARY KEY,"
+            " query TEXT NOT NULL,"
+            " summary TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._db.execute("DELETE FROM summaries WHERE created_at < ?", (time.time() - self.max_age_seconds,))
+        self._db.commit()
+        for doc_id, query, summary, created_at in self._db.execute("SELECT * FROM summaries ORDER BY id"):
+            self._index(doc_id, query, summary, created_at)
+
+    def _index(self, doc_id, query, summary, created_at):
+        # The query is counted twice: it says what the summary is about
+        terms = index_terms(query) * 2 + index_terms(summary)
+        self._docs[doc_id] = {
+            "query": query,
+            "summary": summary,
+            "created_at": created_at,
+            "length": len(terms),
+            "terms": set(terms),
+        }
+        self._total_length += len(terms)
+        for term, count in Counter(terms).items():
+            self._postings[term][doc_id] = count
+
+    def _remove(self, doc_id):
+        doc = self._docs.pop(doc_id)
+        self._total_length -= doc["length"]
+        for term in doc["terms"]:
+            self._postings[term].pop(doc_id, None)
+            if not self._postings[term]:
+                del self._postings[term]
+
+    def add(self, query, summary):
+        """Indexes the summary produced for a search query."""
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO summaries (query, summary, created_at) VALUES (?, ?, ?)", (query, summary, now)
+            )
+            self._db.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.max_age_seconds,))
+            self._db.commit()
+            self._index(cursor.lastrowid, query, summary, now)
+
+    def search(self, query, limit=5):
+        """BM25-ranked fresh documents for `query`, as (score, doc) pairs."""
+        terms = set(index_terms(query))
+        now = time.time()
+        with self._lock:
+            stale = [doc_id for doc_id, doc in self._docs.items() if now - doc["created_at"] > self.max_age_seconds]
+            for doc_id in stale:
+                self._remove(doc_id)
+            if not self._docs:
+                return []
+
+            average_length = self._total_length / len(self._docs)
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term, {})
+                idf = math.log(1 + (len(self._docs) - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, count in postings.items():
+                    length = self._docs[doc_id]["length"]
+                    scores[doc_id] += idf * count * (K1 + 1) / (count + K1 * (1 - B + B * length / average_length))
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [(score, dict(self._docs[doc_id])) for doc_id, score in ranked]
+
+    def lookup(self, query):
+        """
+        Returns the best stored summary for `query` if it recalls at least
+        `min_recall` of the query's terms, otherwise None.
+        """
+        terms = set(index_terms(query))
+        for _, doc in self.search(query, limit=1):
+            if terms and len(terms & doc["terms"]) / len(terms) >= self.min_recall:
+                self.hits += 1
+                return doc
+        self.misses += 1
+        return None
+
+    def stats(self):
+        """Returns lookup hit/miss counters and the number of indexed summaries."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "documents": len(self._docs)}
\ No newline at end of file
@@ -0,0 +1,301 @@
+import asyncio
+import contextvars
+import json
+
+from agents import (
+    Agent,
+    Runner,
+    WebSearchTool,
+    function_tool,
+    trace,
+)
+
+from pydantic import BaseModel
+
+from report_writer import assemble_report, plan_report, write_sections
+
+# Number of search queries researched at the same time
+MAX_CONCURRENT_RESEARCH = 3
+# Saved facts offered to a research agent before it searches the web
+KNOWN_FACTS_LIMIT = 8
+
+
+# Define data models
+class ResearchPlan(BaseModel):
+    topic: str
+    search_queries: list[str]
+    focus_areas: list[str]
+
+class ResearchReport(BaseModel):
+    title: str
+    outline: list[str]
+    report: str
+    sources: list[str]
+    word_count: int
+
+
+class ResearchRun:
+    """What the agents' tools need to know about the research job they are part of."""
+
+    def __init__(self, job, topic, fact_store):
+        self.job = job
+        self.topic = topic
+        self.fact_store = fact_store
+        self.collected_facts = []
+
+# Set by run_research; tool calls run in tasks of the same job, which inherit it
+_current_run = contextvars.ContextVar("current_research_run")
+
+
+# Custom tool for saving facts found during research
+@function_tool
+async def save_important_fact(fact: str, source: str = None) -> str:
+    """Save an important fact discovered during research.
+
+    Args:
+        fact: The important fact to save
+        source: Optional source of the fact
+
+    Returns:
+        Confirmation message
+    """
+    run = _current_run.get()
+    saved, is_new = run.fact_store.add(run.topic, fact, source)
+    # A fact already known from earlier research still belongs to this report, but only once
+    if all(collected["id"] != saved["id"] for collected in run.collected_facts):
+        run.collected_facts.append(saved)
+        run.job.emit("fact", saved["fact"], source=saved["source"])
+
+    return f"Fact saved: {fact}" if is_new else f"Fact already known: {saved['fact']}"
+
+@function_tool
+async def lookup_known_facts(query: str) -> str:
+    """Look up facts saved by earlier research that match a search term.
+
+    Args:
+        query: The search term to look up
+
+    Returns:
+        The matching facts with their sources, one per line
+    """
+    facts = _current_run.get().fact_store.search(query, limit=KNOWN_FACTS_LIMIT)
+    if not facts:
+        return "No saved facts match this search term."
+    return "\n".join(f"- {saved['fact']} (Source: {saved['source']})" for saved in facts)
+
+# Define the agents
+research_agent = Agent(
+    name="Research Agent",
+    instructions="You are a research assistant. Given a search term, you search the web for that term and"
+    "produce a concise summary of the results. The summary must 2-3 paragraphs and less than 300"
+    "words. Capture the main points. Write succintly, no need to have complete sentences or good"
+    "grammar. This will be consumed by someone synthesizing a report, so its vital you capture the"
+    "essence and ignore any fluff. Do not include any additional commentary other than the summary"
+    "itself.\n"
+    "Before searching the web, call lookup_known_facts with the search term. If the saved facts "
+    "already cover the search term well, write the summary from them and skip the web search.",
+    model="gpt-4o-mini",
+    tools=[
+        lookup_known_facts,
+        WebSearchTool(),
+        save_important_fact
+    ],
+)
+
+editor_agent = Agent(
+    name="Editor Agent",
+    handoff_description="A senior researcher who writes comprehensive research reports",
+    instructions="You are a senior researcher tasked with writing a cohesive report for a research query. "
+    "You will be provided with the original query, the research plan, and the findings of the "
+    "research assistants as JSON, with one summary per search query.\n"
+    "You should first come up with an outline for the report that describes the structure and "
+    "flow of the report. Then, generate the report and return that as your final output.\n"
+    "The final output should be in markdown format, and it should be lengthy and detailed. Aim "
+    "for 5-10 pages of content, at least 1000 words.",
+    model="gpt-4o-mini",
+    output_type=ResearchReport,
+)
+
+triage_agent = Agent(
+    name="Triage Agent",
+    instructions="""You are the coordinator of this research operation. Your job is to:
+    1. Understand the user's research topic
+    2. Create a research plan with the following elements:
+        - topic: A clear statement of the research topic
+        - search_queries: A list of 3-5 specific search queries that will help gather information
+        - focus_areas: A list of 3-5 key aspects of the topic to investigate
+
+    Each search query is researched separately and in parallel, so make every query self-contained.
+    Make sure to return your plan in the expected structured format with topic, search_queries, and focus_areas.
+    """,
+    model="gpt-4o-mini",
+    output_type=ResearchPlan,
+)
+
+
+async def research_query(job, query, semaphore):
+    """
+    Runs a research agent for one search query, at most MAX_CONCURRENT_RESEARCH at a time.
+    Returns a dict with the query and its summary (or the error that stopped it).
+    """
+    async with semaphore:
+        job.emit("status", f"🔎 Researching: *{query}*", key=f"query:{query}")
+        try:
+            result = Runner.run_streamed(research_agent, query)
+            async for event in result.stream_events():
+                if (
+                    event.type == "run_item_stream_event"
+                    and event.name == "tool_called"
+                    and getattr(event.item.raw_item, "type", None) == "web_search_call"
+                ):
+                    job.emit("status", f"🌐 Searching the web: *{query}*", key=f"query:{query}")
+        except Exception as e:
+            job.emit("status", f"⚠️ Research failed: *{query}* ({e})", key=f"query:{query}")
+            return {"query": query, "summary": None, "error": str(e)}
+    job.emit("status", f"✅ Researched: *{query}*", key=f"query:{query}")
+    return {"query": query, "summary": str(result.final_output)}
+
+def build_editor_input(topic, research_plan, findings):
+    """Editor prompt with the plan and per-query summaries as structured JSON."""
+    research = {
+        "topic": research_plan.topic,
+        "focus_areas": research_plan.focus_areas,
+        "findings": [
+            {"query": finding["query"], "summary": finding["summary"]}
+            for finding in findings if finding["summary"]
+        ],
+    }
+    return f"Original query: {topic}\n\nResearch:\n{json.dumps(research, indent=2)}"
+
+async def write_report_in_sections(job, editor_input, findings, facts):
+    """Outlines the report, writes its sections concurrently and stitches them into a ResearchReport."""
+    findings = [finding for finding in findings if finding["summary"]]
+    outline = await plan_report(editor_input)
+    job.emit("message", f"🗂️ **Outline**: {len(outline.sections)} sections")
+
+    def show_status(section, text):
+        job.emit("status", text, key=f"section:{id(section)}")
+
+    bodies = await write_sections(outline, findings, show_status)
+    return ResearchReport(**assemble_report(outline, bodies, findings, facts))
+
+# Main research function
+async def run_research(job, topic, conversation_id, parallel_sections, fact_store, checkpoints, research_index=None):
+    """
+    The research workflow, run as a background job: plan, research each query,
+    write the report. Progress is reported through job events, and the output
+    of each stage is checkpointed under the conversation id, so running the
+    same topic again after a failure or cancellation resumes after the last
+    completed stage. Once the report is delivered the run is marked complete,
+    and running the topic again starts fresh research.
+    With a `research_index`, a query that recent research already covers reuses
+    that summary instead of searching the web again.
+    Returns the report: a ResearchReport, or the raw research as markdown if
+    the report could not be written.
+    """
+    if checkpoints.get(conversation_id, "topic") != topic or checkpoints.get(conversation_id, "complete"):
+        checkpoints.clear(conversation_id)
+        checkpoints.set(conversation_id, "topic", topic)
+
+    run = ResearchRun(job, topic, fact_store)
+    run.collected_facts = checkpoints.get(conversation_id, "facts") or []
+    _current_run.set(run)
+    for saved in run.collected_facts:
+        job.emit("fact", saved["fact"], source=saved["source"])
+
+    # Create a trace for the entire workflow
+    with trace("News Research", group_id=conversation_id):
+        saved_plan = checkpoints.get(conversation_id, "plan")
+        if saved_plan:
+            research_plan = ResearchPlan(**saved_plan)
+            job.emit("message", "♻️ **Triage Agent**: Resuming with the saved research plan...")
+        else:
+            # Start with the triage agent
+            job.emit("message", "🔍 **Triage Agent**: Planning research approach...")
+
+            triage_result = await Runner.run(
+                triage_agent,
+                f"Research this topic thoroughly: {topic}. This research will be used to create a comprehensive research report."
+            )
+
+            # Check if the result is a ResearchPlan object or a string
+            if hasattr(triage_result.final_output, 'topic'):
+                research_plan = triage_result.final_output
+            else:
+                # Fallback if we don't get the expected output type
+                research_plan = ResearchPlan(
+                    topic=topic,
+                    search_queries=[topic],
+                    focus_areas=["General information about " + topic]
+                )
+            checkpoints.set(conversation_id, "plan", research_plan.model_dump())
+
+        job.emit("plan", "📋 **Research Plan**:", plan=research_plan.model_dump())
+
+        # Research Agent phase: one run per search query, in parallel
+        job.emit("message", f"🔎 **Research Agent**: Researching {len(research_plan.search_queries)} queries...")
+        for query in research_plan.search_queries:
+            job.emit("status", f"⏳ Queued: *{query}*", key=f"query:{query}")
+
+        # Only queries without a saved summary are researched again
+        saved_summaries = checkpoints.get_all(conversation_id, "summaries")
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_RESEARCH)
+        async def research_and_save(query):
+            if query in saved_summaries:
+                job.emit("status", f"♻️ Restored: *{query}*", key=f"query:{query}")
+                return saved_summaries[query]
+            known = research_index.lookup(query) if research_index is not None else None
+            if known:
+                job.emit("status", f"📚 Reused recent research: *{query}*", key=f"query:{query}")
+                finding = {"query": query, "summary": known["summary"]}
+            else:
+                finding = await research_query(job, query, semaphore)
+                if finding["summary"] and research_index is not None:
+                    research_index.add(query, finding["summary"])
+            if finding["summary"]:
+                checkpoints.set(conversation_id, "summaries", finding, key=query)
+                checkpoints.set(conversation_id, "facts", run.collected_facts)
+            return finding
+
+        findings = await asyncio.gather(*[research_and_save(query) for query in research_plan.search_queries])
+
+        if not any(finding["summary"] for finding in findings):
+            raise RuntimeError("All research queries failed: " + "; ".join(finding["error"] for finding in findings))
+
+        # Editor Agent phase
+        job.emit("message", "📝 **Editor Agent**: Creating comprehensive research report...")
+
+        try:
+            saved_report = checkpoints.get(conversation_id, "report")
+            if saved_report:
+                report = ResearchReport(**saved_report)
+            else:
+                editor_input = build_editor_input(topic, research_plan, findings)
+                if parallel_sections:
+                    report = await write_report_in_sections(job, editor_input, findings, run.collected_facts)
+                else:
+                    report = (await Runner.run(editor_agent, editor_input)).final_output
+                if isinstance(report, ResearchReport):
+                    checkpoints.set(conversation_id, "report", report.model_dump())
+
+            job.emit("message", "✅ **Research Complete! Report Generated.**")
+
+            # Preview a snippet of the report
+            if hasattr(report, 'report'):
+                report_preview = report.report[:300] + "..."
+            else:
+                report_preview = str(report)[:300] + "..."
+            job.emit("preview", report_preview)
+            # Only unfinished runs resume; the saved report still shows after a browser refresh
+            checkpoints.set(conversation_id, "complete", True)
+            return report
+
+        except Exception as e:
+            job.emit("error", f"Error generating report: {str(e)}")
+            job.emit("message", "⚠️ **Research completed but there was an issue generating the structured report.**")
+            job.emit("message", "Raw research results are available in the Report tab.")
+            job.emit("message", "Start the research again to retry the report; the plan and research are reused.")
+            # Fallback to the raw research summaries
+            return "\n\n".join(
+                f"## {finding['query']}\n\n{finding['summary']}" for finding in findings if finding["summary"]
+            )
\ No newline at end of file
@@ -0,0 +1,45 @@
+from trace_store import agent_latencies, critical_path, time_breakdown
+
+
+def span(span_id, started_at, ended_at, parent_id=None, type="agent", name="Research Agent"):
+    return {
+        "span_id": span_id,
+        "parent_id": parent_id,
+        "type": type,
+        "name": name,
+        "started_at": started_at,
+        "ended_at": ended_at,
+        "input_tokens": None,
+        "output_tokens": None,
+    }
+
+
+def test_critical_path_follows_the_blocking_chain():
+    spans = [
+        span("plan", 0.0, 2.0),
+        span("fast", 2.0, 3.0),
+        span("slow", 2.0, 6.0),
+        span("write", 6.0, 9.0),
+    ]
+    assert [step["span_id"] for step in critical_path(spans)] == ["plan", "slow", "write"]
+
+
+def test_zero_length_spans_do_not_loop():
+    spans = [
+        span("agent", 0.0, 2.0),
+        span("handoff", 2.0, 2.0, type="handoff"),
+        span("instant", 1.0, 1.0, parent_id="agent", type="function"),
+    ]
+    path = critical_path(spans)
+    # The handoff ends with the agent, so it does not extend the path
+    assert [step["span_id"] for step in path] == ["agent", "instant"]
+
+
+def test_spans_without_a_start_are_skipped():
+    spans = [span("agent", 0.0, 2.0), span("unstarted", None, 1.0, type="response")]
+
+    assert [step["span_id"] for step in critical_path(spans)] == ["agent"]
+    assert time_breakdown(spans)["model_seconds"] == 0.0
+    assert agent_latencies(spans + [span("other", None, 3.0)]) == [
+        {"agent": "Research Agent", "runs": 1, "p50": 2.0, "p95": 2.0}
+    ]
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""
+Latency profile of research runs from the local trace store.
+
+Prints the critical path of a trace, the share of time spent waiting on the
+model versus tools, and per-agent p50/p95 latency over the most recent traces.
+
+Usage:
+    python trace_report.py [--db research_traces.sqlite3] [--trace-id TRACE_ID | --group CONVERSATION_ID] [--recent N]
+"""
+import argparse
+import os
+import sys
+
+from trace_store import LATENCY_WINDOW_TRACES, TraceStore, trace_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.environ.get("RESEARCH_TRACE_STORE_PATH", "research_traces.sqlite3"))
+    parser.add_argument("--trace-id", help="Trace to report on (default: the most recent one)")
+    parser.add_argument("--group", help="Report on the most recent trace of this conversation id")
+    parser.add_argument(
+        "--recent", type=int, default=LATENCY_WINDOW_TRACES, help="Traces covered by the agent latency percentiles"
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        sys.exit(f"No trace store at {args.db}")
+    store = TraceStore(args.db)
+
+    trace_id = args.trace_id
+    if trace_id is None:
+        latest = store.latest_trace(args.group)
+        if latest is None:
+            sys.exit("No traces recorded yet")
+        trace_id = latest["trace_id"]
+
+    report = trace_report(store, trace_id, recent_traces=args.recent)
+    breakdown = report["breakdown"]
+    print(f"Trace {trace_id}: {report['span_count']} spans")
+    print(
+        f"Waiting on the model: {breakdown['model_seconds']:.1f}s ({breakdown['model_share']:.0%}), "
+        f"on tools: {breakdown['tool_seconds']:.1f}s ({breakdown['tool_share']:.0%})"
+    )
+    print(f"Tokens: {breakdown['input_tokens']:,} in, {breakdown['output_tokens']:,} out")
+
+    print("\nCritical path:")
+    for step in report["critical_path"]:
+        label = "  " * step["depth"] + f"{step['type']}: {step['name']}"
+        print(f"  {label:<60} +{step['start']:7.2f}s {step['seconds']:8.2f}s")
+
+    print(f"\nAgent latency (last {args.recent} traces):")
+    print(f"  {'agent':<30} {'runs':>5} {'p50':>8} {'p95':>8}")
+    for row in report["agent_latencies"]:
+        print(f"  {row['agent']:<30} {row['runs']:>5} {row['p50']:7.2f}s {row['p95']:7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
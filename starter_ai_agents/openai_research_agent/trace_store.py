@@ -0,0 +1,303 @@
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from agents.tracing import TracingProcessor
+
+# Span types that are time spent waiting on the model or on tools
+MODEL_SPAN_TYPES = ("response", "generation")
+TOOL_SPAN_TYPES = ("function", "mcp_tools")
+# Agent latency percentiles cover this many of the most recent traces
+LATENCY_WINDOW_TRACES = 100
+
+
+def _timestamp(value):
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+def _span_name(data):
+    """A readable name for a span: the agent, tool or model it is about."""
+    if data.type == "handoff":
+        return f"{data.from_agent} -> {data.to_agent}"
+    if data.type == "response":
+        response = getattr(data, "response", None)
+        return getattr(response, "model", None) or "response"
+    if data.type == "generation":
+        return data.model or "generation"
+    return getattr(data, "name", None) or data.type
+
+
+def _span_usage(data):
+    """(input_tokens, output_tokens) of a model span, or (None, None)."""
+    usage = getattr(data, "usage", None)
+    if not usage and getattr(data, "response", None) is not None:
+        usage = data.response.usage
+    if not usage:
+        return None, None
+    if not isinstance(usage, dict):
+        usage = usage.model_dump()
+    return (
+        usage.get("input_tokens", usage.get("prompt_tokens")),
+        usage.get("output_tokens", usage.get("completion_tokens")),
+    )
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class TraceStore(TracingProcessor):
+    """
+    Tracing processor that keeps traces and spans locally instead of (or as well
+    as) sending them to the hosted dashboard. Spans are written to SQLite (WAL
+    mode) as they end, with their timings, parent and token usage, and are
+    optionally appended to a JSONL file. Only the `max_traces` most recent
+    traces and their spans are kept.
+    """
+
+    def __init__(self, path, jsonl_path=None, max_traces=1000):
+        self.jsonl_path = jsonl_path
+        self.max_traces = max_traces
+        # Spans end on the job runner's thread while the UI reads from the script threads
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS traces ("
+            " trace_id TEXT PRIMARY KEY,"
+            " name TEXT NOT NULL,"
+            " group_id TEXT,"
+            " started_at REAL NOT NULL,"
+            " ended_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS traces_group ON traces (group_id, started_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS traces_started_at ON traces (started_at)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS spans ("
+            " span_id TEXT PRIMARY KEY,"
+            " trace_id TEXT NOT NULL,"
+            " parent_id TEXT,"
+            " type TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " started_at REAL,"
+            " ended_at REAL,"
+            " input_tokens INTEGER,"
+            " output_tokens INTEGER,"
+            " error TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS spans_trace ON spans (trace_id)")
+        self._prune()
+        self._db.commit()
+
+    def _prune(self):
+        """Removes traces beyond the `max_traces` most recent, with their spans. Called with the lock held."""
+        self._db.execute(
+            "DELETE FROM traces WHERE trace_id NOT IN ("
+            " SELECT trace_id FROM traces ORDER BY started_at DESC LIMIT ?)",
+            (self.max_traces,),
+        )
+        self._db.execute("DELETE FROM spans WHERE trace_id NOT IN (SELECT trace_id FROM traces)")
+
+    # TracingProcessor interface
+
+    def on_trace_start(self, trace):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO traces (trace_id, name, group_id, started_at) VALUES (?, ?, ?, ?)",
+                (trace.trace_id, trace.name, getattr(trace, "group_id", None), time.time()),
+            )
+            self._prune()
+            self._db.commit()
+
+    def on_trace_end(self, trace):
+        with self._lock:
+            self._db.execute("UPDATE traces SET ended_at = ? WHERE trace_id = ?", (time.time(), trace.trace_id))
+            self._db.commit()
+
+    def on_span_start(self, span):
+        pass
+
+    def on_span_end(self, span):
+        data = span.span_data
+        input_tokens, output_tokens = _span_usage(data) if data.type in MODEL_SPAN_TYPES else (None, None)
+        record = {
+            "span_id": span.span_id,
+            "trace_id": span.trace_id,
+            "parent_id": span.parent_id,
+            "type": data.type,
+            "name": _span_name(data),
+            "started_at": _timestamp(span.started_at),
+            "ended_at": _timestamp(span.ended_at),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "error": json.dumps(span.error) if span.error else None,
+        }
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO spans ({', '.join(record)}) VALUES ({', '.join('?' * len(record))})",
+                list(record.values()),
+            )
+            self._db.commit()
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    def shutdown(self):
+        with self._lock:
+            self._db.close()
+
+    def force_flush(self):
+        pass
+
+    # Queries
+
+    def latest_trace(self, group_id=None):
+        """The most recent trace, optionally of one group (conversation). Returns a dict or None."""
+        with self._lock:
+            if group_id is None:
+                row = self._db.execute("SELECT * FROM traces ORDER BY started_at DESC LIMIT 1").fetchone()
+            else:
+                row = self._db.execute(
+                    "SELECT * FROM traces WHERE group_id = ? ORDER BY started_at DESC LIMIT 1", (group_id,)
+                ).fetchone()
+        return dict(row) if row else None
+
+    def spans(self, trace_id=None):
+        """Finished spans of one trace, or of every trace, ordered by start time."""
+        with self._lock:
+            if trace_id is None:
+                rows = self._db.execute("SELECT * FROM spans ORDER BY started_at").fetchall()
+            else:
+                rows = self._db.execute(
+                    "SELECT * FROM spans WHERE trace_id = ? ORDER BY started_at", (trace_id,)
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def agent_spans(self, recent_traces=LATENCY_WINDOW_TRACES):
+        """Finished agent spans of the `recent_traces` most recent traces."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM spans WHERE type = 'agent' AND started_at IS NOT NULL AND ended_at IS NOT NULL"
+                " AND trace_id IN ("
+                " SELECT trace_id FROM traces ORDER BY started_at DESC LIMIT ?)",
+                (recent_traces,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def _blocking_chain(siblings):
+    """
+    The sibling spans that one after another determined when the last of them
+    ended: the span that ends last, then the one that ended last before it
+    started, and so on. Returned in time order.
+    """
+    chain, limit, remaining = [], math.inf, list(siblings)
+    while True:
+        candidates = [span for span in remaining if span["ended_at"] <= limit]
+        if not candidates:
+            return chain[::-1]
+        span = max(candidates, key=lambda candidate: candidate["ended_at"])
+        chain.append(span)
+        # A zero-length span ends where it starts; it must not be picked again
+        remaining.remove(span)
+        limit = span["started_at"]
+
+
+def critical_path(spans):
+    """
+    The chain of spans that determined the trace's duration, found by taking
+    the blocking chain of the top-level spans and expanding each span into the
+    blocking chain of its children. Spans running in parallel with a longer one
+    are left out. Returns span dicts with an added `depth`, in time order.
+    """
+    finished = [span for span in spans if span["started_at"] is not None and span["ended_at"] is not None]
+    span_ids = {span["span_id"] for span in finished}
+    children = defaultdict(list)
+    for span in finished:
+        # Spans whose parent is not a span (e.g. the trace itself) are top-level
+        parent = span["parent_id"] if span["parent_id"] in span_ids else None
+        children[parent].append(span)
+
+    path = []
+    def expand(siblings, depth):
+        for span in _blocking_chain(siblings):
+            path.append({**span, "depth": depth})
+            expand(children[span["span_id"]], depth + 1)
+    expand(children[None], 0)
+    return path
+
+
+def agent_latencies(spans):
+    """Per-agent run count and p50/p95 latency in seconds, slowest p95 first."""
+    durations = defaultdict(list)
+    for span in spans:
+        if span["type"] == "agent" and span["started_at"] is not None and span["ended_at"] is not None:
+            durations[span["name"]].append(span["ended_at"] - span["started_at"])
+    return sorted(
+        (
+            {"agent": name, "runs": len(values), "p50": percentile(values, 0.5), "p95": percentile(values, 0.95)}
+            for name, values in durations.items()
+        ),
+        key=lambda row: row["p95"],
+        reverse=True,
+    )
+
+
+def time_breakdown(spans):
+    """
+    Total span time spent waiting on the model versus on tools, in seconds,
+    with their shares. Concurrent spans are all counted, so the totals can
+    exceed the wall-clock time. Hosted tools such as web search run inside
+    model responses and count as model time.
+    """
+    totals = {"model": 0.0, "tool": 0.0}
+    tokens = {"input": 0, "output": 0}
+    for span in spans:
+        if span["started_at"] is None or span["ended_at"] is None:
+            continue
+        duration = span["ended_at"] - span["started_at"]
+        if span["type"] in MODEL_SPAN_TYPES:
+            totals["model"] += duration
+            tokens["input"] += span["input_tokens"] or 0
+            tokens["output"] += span["output_tokens"] or 0
+        elif span["type"] in TOOL_SPAN_TYPES:
+            totals["tool"] += duration
+    waiting = totals["model"] + totals["tool"]
+    return {
+        "model_seconds": totals["model"],
+        "tool_seconds": totals["tool"],
+        "model_share": totals["model"] / waiting if waiting else 0.0,
+        "tool_share": totals["tool"] / waiting if waiting else 0.0,
+        "input_tokens": tokens["input"],
+        "output_tokens": tokens["output"],
+    }
+
+
+def trace_report(store, trace_id, recent_traces=LATENCY_WINDOW_TRACES):
+    """Critical path and time breakdown of one trace, plus agent latencies over the `recent_traces` latest traces."""
+    spans = store.spans(trace_id)
+    path = critical_path(spans)
+    trace_start = min((span["started_at"] for span in spans if span["started_at"] is not None), default=None)
+    return {
+        "trace_id": trace_id,
+        "span_count": len(spans),
+        "critical_path": [
+            {
+                "depth": span["depth"],
+                "type": span["type"],
+                "name": span["name"],
+                "start": span["started_at"] - trace_start,
+                "seconds": span["ended_at"] - span["started_at"],
+            }
+            for span in path
+        ],
+        "breakdown": time_breakdown(spans),
+        "agent_latencies": agent_latencies(store.agent_spans(recent_traces)),
+    }
\ No newline at end of file